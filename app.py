@@ -2,18 +2,34 @@ import gradio as gr
 import asyncio
 from datetime import datetime
 import os
-import gdown
+import threading
 from dotenv import load_dotenv
 import logging
+from typing import Optional
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import agents
-from src.my_agents.triage_agent.triage_agent import triage_agent
-from src.my_agents.product_info_agent.product_info_agent_tools import _initialize_product_rag_components
-from src.my_agents.support_info_agent.support_info_agent_tools import _initialize_support_rag_components
+from src.my_agents.triage_agent.triage_agent import triage_agent, intent_router, select_agent, nested_triage_agent, flat_triage_agent
+from src.my_agents.product_info_agent.product_info_agent import productInfoAgent
+from src.my_agents.support_info_agent.support_info_agent import supportInfoAgent
+from src.my_agents.notification_agent import notification_agent
+from src.my_agents.triage_agent.intent_router import LOCAL_ROUTER_ENABLED
+from src.my_agents.product_info_agent.product_info_agent_tools import product_knowledge_base
+from src.my_agents.support_info_agent.support_info_agent_tools import support_knowledge_base
+from src.my_agents.shared.readiness import readiness, warm_up_knowledge_bases
+from src.my_agents.shared.downloads import KB_MIRROR, DownloadArtifact, download_artifacts, mirror_artifacts
+from src.my_agents.shared.hot_reload import KnowledgeBaseReloader
+from src.my_agents.shared.guardrails import check_turn, guardrail_agent
+from src.my_agents.shared.guardrail_rules import check_rules
+from src.my_agents.shared.faq_index import FAQ_ANSWERS_FILE, FAQ_FAST_PATH_ENABLED, FAQ_MINE_KNOWLEDGE_BASES, FaqIndex, load_faq_entries
+from src.my_agents.shared.run_context import TurnContext
+from src.my_agents.shared.speculation import GUARDRAIL_SPECULATIVE, run_speculatively, speculation_stats
+from src.my_agents.shared.streaming import STREAM_RESPONSES, stream_answer
+from src.my_agents.shared.answer_cache import ANSWER_CACHE_BYPASS_HEADER, AnswerCache, AnswerHit
+from src.my_agents.shared.knowledge_base import run_in_query_pool
 
 # Import runners
 from agents import Runner, trace, InputGuardrailTripwireTriggered
@@ -26,105 +42,157 @@ os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 if not os.getenv("OPENAI_API_KEY"):
     raise ValueError("OPENAI_API_KEY environment variable is not set. Please set it in Hugging Face Spaces secrets.")
 
+# Directory the knowledge base artifacts are downloaded into (paths below are relative to it)
+KB_DOWNLOAD_DIR = "src/chroma_dbs"
+
+# Default artifacts on Google Drive. They carry no checksum yet, so they are downloaded with a
+# warning (or refused with KB_REQUIRE_CHECKSUMS=true). Set KB_MIRROR to a local directory, file:// URL or
+# http(s) URL holding artifacts.json (which pins every file's SHA-256) to download from a mirror instead.
+KB_ARTIFACTS = [
+    DownloadArtifact(path="product_info_db/chroma.sqlite3",
+                     url="https://drive.google.com/uc?id=1kNEJQswOZuLnZGGIHTSfKBrQHB-vB7S_"),
+    DownloadArtifact(path="support_info_db/chroma.sqlite3",
+                     url="https://drive.google.com/uc?id=17ZfKQxuQyN1s3zJ_Fn3RTVQv32A7e1v3"),
+]
+
 def download_database_files():
-    """Download database files from Google Drive if they don't exist."""
+    """Download database files concurrently (resumable, checksum-verified) if they are missing or incomplete."""
     # Print current working directory
     print(f"\nCurrent working directory: {os.getcwd()}")
-    
-    # Create directories if they don't exist
-    product_db_dir = "src/chroma_dbs/product_info_db"
-    support_db_dir = "src/chroma_dbs/support_info_db"
-    
-    print(f"\nCreating directories:")
-    print(f"Product DB directory: {os.path.abspath(product_db_dir)}")
-    print(f"Support DB directory: {os.path.abspath(support_db_dir)}")
-    
-    os.makedirs(product_db_dir, exist_ok=True)
-    os.makedirs(support_db_dir, exist_ok=True)
-
-    # Product Info DB file
-    product_db_file = {
-        "chroma.sqlite3": "1kNEJQswOZuLnZGGIHTSfKBrQHB-vB7S_"
-    }
-
-    # Support Info DB file
-    support_db_file = {
-        "chroma.sqlite3": "17ZfKQxuQyN1s3zJ_Fn3RTVQv32A7e1v3"
-    }
 
-    # Download Product Info DB file
-    for filename, file_id in product_db_file.items():
-        dest_path = os.path.join(product_db_dir, filename)
-        print(f"\nChecking Product DB file:")
-        print(f"Destination path: {os.path.abspath(dest_path)}")
-        print(f"File exists: {os.path.exists(dest_path)}")
-        
-        if not os.path.exists(dest_path):
-            print(f"\nDownloading product info DB file:")
-            print(f"File: {filename}")
-            print(f"From: https://drive.google.com/uc?id={file_id}")
-            print(f"To: {os.path.abspath(dest_path)}")
-            
-            url = f'https://drive.google.com/uc?id={file_id}'
-            gdown.download(url, dest_path, quiet=False)
-            
-            print(f"\nDownload complete:")
-            print(f"File exists: {os.path.exists(dest_path)}")
-            print(f"File size: {os.path.getsize(dest_path) if os.path.exists(dest_path) else 'N/A'} bytes")
-
-    # Download Support Info DB file
-    for filename, file_id in support_db_file.items():
-        dest_path = os.path.join(support_db_dir, filename)
-        print(f"\nChecking Support DB file:")
-        print(f"Destination path: {os.path.abspath(dest_path)}")
-        print(f"File exists: {os.path.exists(dest_path)}")
-        
-        if not os.path.exists(dest_path):
-            print(f"\nDownloading support info DB file:")
-            print(f"File: {filename}")
-            print(f"From: https://drive.google.com/uc?id={file_id}")
-            print(f"To: {os.path.abspath(dest_path)}")
-            
-            url = f'https://drive.google.com/uc?id={file_id}'
-            gdown.download(url, dest_path, quiet=False)
-            
-            print(f"\nDownload complete:")
-            print(f"File exists: {os.path.exists(dest_path)}")
-            print(f"File size: {os.path.getsize(dest_path) if os.path.exists(dest_path) else 'N/A'} bytes")
+    if KB_MIRROR:
+        print(f"Downloading knowledge base artifacts from mirror: {KB_MIRROR}")
+        artifacts = mirror_artifacts(KB_MIRROR)
+    else:
+        artifacts = KB_ARTIFACTS
+    print(f"Destination directory: {os.path.abspath(KB_DOWNLOAD_DIR)}")
+    return download_artifacts(artifacts, KB_DOWNLOAD_DIR)
 
 # Download database files before initializing the agent
 print("\n=== Starting Database Download Process ===")
 download_database_files()
 print("=== Database Download Process Complete ===\n")
 
-# Initialize the databases
-try:
-    print("\n=== Starting Database Initialization ===")
-    _initialize_product_rag_components()
-    _initialize_support_rag_components()
-    print("=== Database Initialization Complete ===\n")
-except Exception as e:
-    print(f"\nERROR: Failed to initialize database: {e}")
-    raise
-
-async def process_query(message: str, history: list) -> tuple:
+# Pre-approved answers to the most frequent questions, served without any LLM call
+faq_index = FaqIndex(
+    load_faq_entries(FAQ_ANSWERS_FILE),
+    [product_knowledge_base, support_knowledge_base] if FAQ_MINE_KNOWLEDGE_BASES else []
+)
+
+# Final answers to repeated questions. Answers are dropped when a knowledge base or any agent
+# changes, and answers of the notification agent are never cached because sending has side effects.
+answer_cache = AnswerCache(
+    agents=[nested_triage_agent, flat_triage_agent, productInfoAgent, supportInfoAgent, notification_agent, guardrail_agent],
+    knowledge_bases=[product_knowledge_base, support_knowledge_base],
+    uncacheable_agents=[notification_agent]
+)
+
+# Initialize and warm up the databases and embedding model in the background, so the
+# server can answer health checks while warming. /readyz reports 503 until every
+# component is warm, and the load balancer only routes traffic to ready replicas.
+def warm_up():
+    warm_up_knowledge_bases([product_knowledge_base, support_knowledge_base])
+    if FAQ_FAST_PATH_ENABLED:
+        try:
+            faq_index.warm_up()
+        except Exception as e:
+            print(f"ERROR: FAQ index warm-up failed: {e}")
+    if LOCAL_ROUTER_ENABLED:
+        try:
+            intent_router.warm_up()
+        except Exception as e:
+            print(f"ERROR: Local router warm-up failed: {e}")
+
+warm_up_thread = threading.Thread(
+    target=warm_up,
+    name="kb-warm-up",
+    daemon=True
+)
+warm_up_thread.start()
+
+# Reload the knowledge bases when new data is published, without restarting the app. The
+# watcher skips knowledge bases that are still warming up; KB_RELOAD_INTERVAL_SECONDS=0 disables it.
+kb_reloader = KnowledgeBaseReloader([product_knowledge_base, support_knowledge_base])
+kb_reloader.start()
+
+async def answer_from_faq(message: str) -> Optional[str]:
+    """Returns the pre-approved answer if the message is a frequent question, or None."""
+    # Inputs that break a guardrail rule never take this path, so they still get the full guardrail treatment
+    if FAQ_FAST_PATH_ENABLED and check_rules(message, "universal") is None:
+        faq_match = await run_in_query_pool(faq_index.match, message)
+        if faq_match is not None:
+            return faq_match.answer
+    return None
+
+async def select_turn_agent(message: str):
+    """Returns the agent that answers the message: the triage agent, or the agent the local router is confident about."""
+    if not LOCAL_ROUTER_ENABLED:
+        return triage_agent
+    decision = await run_in_query_pool(intent_router.route, message)
+    agent = select_agent(decision)
+    print(f"[DEBUG] Local router: {decision.best_route} (similarity={decision.similarity:.3f}, "
+          f"margin={decision.margin:.3f}) -> {agent.name}")
+    return agent
+
+async def lookup_cached_answer(message: str, agent, request: Optional[gr.Request]) -> Optional[AnswerHit]:
+    """Returns the cached answer to the message, unless the request asks to bypass the answer cache."""
+    if not answer_cache.enabled:
+        return None
+    bypass = request is not None and request.headers.get(ANSWER_CACHE_BYPASS_HEADER, "").lower() in ("1", "true", "yes")
+    hit = await run_in_query_pool(answer_cache.lookup, message, agent, bypass)
+    if hit is not None:
+        kind = f"semantic, similarity={hit.similarity:.3f}" if hit.semantic else "exact"
+        print(f"[DEBUG] Answer cache hit ({kind}, answered by {hit.answer.agent_name})")
+    return hit
+
+async def process_query(message: str, history: list, request: gr.Request = None) -> tuple:
     """
     Process user query through the triage agent system.
     
     Args:
         message: The user's message
         history: The chat history
+        request: The HTTP request; the X-Bypass-Answer-Cache header skips the answer cache
     
     Returns:
         tuple: (empty string, updated history)
     """
     try:
+        # Frequent questions get their pre-approved answer directly
+        faq_answer = await answer_from_faq(message)
+        if faq_answer is not None:
+            history.append((message, faq_answer))
+            return "", history
+
+        # Confident cases go straight to the specialized agent; the rest through the triage agent
+        agent = await select_turn_agent(message)
+
+        # An exact repeat was checked by the guardrail when it was first answered
+        cached = await lookup_cached_answer(message, agent, request)
+        if cached is not None and not cached.semantic:
+            history.append((message, cached.answer.answer))
+            return "", history
+
+        # Check the user's input once for the whole turn; the guarded sub-agents reuse the
+        # verdict from the run context instead of calling the guardrail LLM again.
+        turn = TurnContext(user_input=message)
+        if not GUARDRAIL_SPECULATIVE or cached is not None:
+            await check_turn(turn)
+        if cached is not None:
+            history.append((message, cached.answer.answer))
+            return "", history
+
         # Run through triage agent which will handle routing to appropriate agent
         with trace("Triage Agent Test") as tracer:
-            result = await Runner.run(triage_agent, message)
+            if GUARDRAIL_SPECULATIVE:
+                # Answer while the guardrail runs; the answer is cancelled if the guardrail trips
+                result = await run_speculatively(turn, lambda: Runner.run(agent, message, context=turn))
+            else:
+                result = await Runner.run(agent, message, context=turn)
         
         # Get the response
         response = result.final_output
+        await run_in_query_pool(answer_cache.store, message, agent, result)
         
         # Add metadata to history
         metadata = {
@@ -147,6 +215,73 @@ async def process_query(message: str, history: list) -> tuple:
         history.append((message, error_message))
         return "", history
 
+async def process_query_streaming(message: str, history: list, request: gr.Request = None):
+    """
+    Streaming variant of process_query: yields the updated history while the answer is generated,
+    so the user sees agent progress and then the answer token by token.
+
+    If a guardrail trips, the partial answer is replaced by the same refusal process_query gives.
+    
+    Args:
+        message: The user's message
+        history: The chat history
+        request: The HTTP request; the X-Bypass-Answer-Cache header skips the answer cache
+    
+    Yields:
+        tuple: (empty string, updated history)
+    """
+    answer_row = None
+
+    def show(text: str) -> tuple:
+        nonlocal answer_row
+        if answer_row is None:
+            history.append((message, text))
+            answer_row = len(history) - 1
+        else:
+            history[answer_row] = (message, text)
+        return "", history
+
+    try:
+        faq_answer = await answer_from_faq(message)
+        if faq_answer is not None:
+            yield show(faq_answer)
+            return
+
+        agent = await select_turn_agent(message)
+        cached = await lookup_cached_answer(message, agent, request)
+        if cached is not None and not cached.semantic:
+            yield show(cached.answer.answer)
+            return
+
+        turn = TurnContext(user_input=message)
+        if not GUARDRAIL_SPECULATIVE or cached is not None:
+            await check_turn(turn)
+        if cached is not None:
+            yield show(cached.answer.answer)
+            return
+
+        yield show("_Thinking..._")
+        finished = []
+        async for text in stream_answer(agent, message, turn, speculative=GUARDRAIL_SPECULATIVE, on_result=finished.append):
+            yield show(text)
+        if finished:
+            await run_in_query_pool(answer_cache.store, message, agent, finished[0])
+    except InputGuardrailTripwireTriggered as e:
+        logger.warning(f"Input guardrail triggered: {e}")
+        yield show("I apologize, but I cannot process that request.")
+    except Exception as e:
+        logger.error(f"Error processing query: {e}")
+        yield show(f"An error occurred: {str(e)}")
+
+def get_readiness_markdown() -> str:
+    """Formats the readiness state for display in the interface."""
+    state = readiness.snapshot()
+    if state["ready"]:
+        return "🟢 Assistant is ready."
+    if any(c["status"] == "failed" for c in state["components"].values()):
+        return "🔴 Assistant failed to start. Please contact support."
+    return "🟡 Assistant is warming up; the first answers may be slower."
+
 def create_interface():
     """
     Create and configure the Gradio interface.
@@ -169,6 +304,7 @@ def create_interface():
         
         How can I assist you today?
         """)
+        status = gr.Markdown(get_readiness_markdown())
         
         with gr.Row():
             with gr.Column(scale=4):
@@ -202,21 +338,24 @@ def create_interface():
                 """)
         
         # Event handlers
+        chat_fn = process_query_streaming if STREAM_RESPONSES else process_query
         submit.click(
-            process_query,
+            chat_fn,
             inputs=[msg, chatbot],
             outputs=[msg, chatbot],
             api_name="chat"
         )
         
         msg.submit(
-            process_query,
+            chat_fn,
             inputs=[msg, chatbot],
             outputs=[msg, chatbot],
             api_name="chat"
         )
         
         clear.click(lambda: None, None, chatbot, queue=False)
+
+        demo.load(get_readiness_markdown, None, status, queue=False)
     
     # Add custom CSS to style the chat input
     demo.css = """
@@ -228,11 +367,73 @@ def create_interface():
     
     return demo
 
+def create_http_app(demo):
+    """
+    Wraps the Gradio interface in a FastAPI app with health endpoints for load balancers:
+    /healthz (process is up) and /readyz (200 once warm-up finished, 503 before).
+
+    If KB_ADMIN_TOKEN is set, POST /admin/reload (with the token in the X-Admin-Token header)
+    reloads the knowledge bases from their configured paths, GET /admin/faq reports the
+    FAQ fast path's hit rate, per-entry usage and most frequent misses, GET /admin/answer-cache
+    reports the answer cache's hits, misses and size, and GET /admin/speculation reports the
+    speculative guardrail's tripped turns, discarded work and hidden guardrail latency.
+    """
+    import hmac
+    from fastapi import FastAPI, Header
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI()
+
+    @app.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    def readyz():
+        state = readiness.snapshot()
+        return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+    admin_token = os.getenv("KB_ADMIN_TOKEN")
+    if admin_token:
+        @app.post("/admin/reload")
+        async def admin_reload(force: bool = False, x_admin_token: str = Header(default="")):
+            if not hmac.compare_digest(x_admin_token.encode(), admin_token.encode()):
+                return JSONResponse({"error": "invalid admin token"}, status_code=403)
+            # Loading and warming the new version is blocking; keep it off the event loop
+            results = await run_in_threadpool(kb_reloader.reload_all, force)
+            failed = any(result["status"] == "failed" for result in results.values())
+            return JSONResponse(results, status_code=500 if failed else 200)
+
+        @app.get("/admin/faq")
+        def admin_faq(x_admin_token: str = Header(default="")):
+            if not hmac.compare_digest(x_admin_token.encode(), admin_token.encode()):
+                return JSONResponse({"error": "invalid admin token"}, status_code=403)
+            return {"enabled": FAQ_FAST_PATH_ENABLED, **faq_index.stats()}
+
+        @app.get("/admin/answer-cache")
+        def admin_answer_cache(x_admin_token: str = Header(default="")):
+            if not hmac.compare_digest(x_admin_token.encode(), admin_token.encode()):
+                return JSONResponse({"error": "invalid admin token"}, status_code=403)
+            return answer_cache.stats()
+
+        @app.get("/admin/speculation")
+        def admin_speculation(x_admin_token: str = Header(default="")):
+            if not hmac.compare_digest(x_admin_token.encode(), admin_token.encode()):
+                return JSONResponse({"error": "invalid admin token"}, status_code=403)
+            return {"enabled": GUARDRAIL_SPECULATIVE, **speculation_stats.snapshot()}
+
+    return gr.mount_gradio_app(app, demo, path="/")
+
 if __name__ == "__main__":
     demo = create_interface()
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=7860,
-        share=True,
-        debug=True
-    ) 
\ No newline at end of file
+    if os.getenv("SERVE_HTTP_APP", "false").lower() in ("1", "true", "yes"):
+        import uvicorn
+        uvicorn.run(create_http_app(demo), host="0.0.0.0", port=7860)
+    else:
+        demo.launch(
+            server_name="0.0.0.0",
+            server_port=7860,
+            share=True,
+            debug=True
+        ) 
\ No newline at end of file
@@ -1,7 +1,24 @@
 import os
+import re
+import sys
+import time
+import queue
+import argparse
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+import numpy as np
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+
+# Make the shared agent modules importable when this script is run directly from src/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from my_agents.shared.lexical_index import BM25Index, LEXICAL_INDEX_FILENAME
+from my_agents.shared.kb_bundle import BUNDLE_DTYPES, bundle_path_for, export_bundle
+from my_agents.shared.embeddings import (
+    EMBEDDING_MODEL_DIR, EMBEDDING_MODEL_METADATA_KEY, EMBEDDING_QUANTIZED, OnnxEmbeddingModel, get_embedding_model
+)
 
 # --- Configuration ---
 # Directory where the text files are located
@@ -20,14 +37,111 @@ SUPPORT_CHROMA_PATH = os.path.join(CHROMA_DB_BASE_PATH, "support_info_db")
 PRODUCT_COLLECTION_NAME = "product_info_collection"
 SUPPORT_COLLECTION_NAME = "support_info_collection"
 
-# Embedding model to use. 'all-MiniLM-L6-v2' is a good balance of size/performance.
-EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Embeddings come from the shared ONNX all-MiniLM-L6-v2 model in my_agents/shared/embeddings.py,
+# the same component the query tools use, so stored and query embeddings always match.
+
+# --- Embedding Pipeline Parameters ---
+# Chunks are embedded in batches by a pool of worker processes and written to Chroma by a
+# separate writer thread. At most QUEUE_SIZE batches wait between each pair of stages,
+# so memory stays bounded no matter how large the corpus is.
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+PIPELINE_QUEUE_SIZE = 4
 
 # --- Chunking Parameters ---
 # We'll split by section headers (### SECTION: ... ###) and then by paragraphs.
 # This approach leverages your data's existing structure for semantic chunking.
 SECTION_DELIMITER = "### SECTION:"
-PARAGRAPH_DELIMITER = "\n\n" # Primary split within sections
+PARAGRAPH_DELIMITER = "\n\n" # Primary split within sections (a blank line when streaming)
+
+# Paragraphs longer than CHUNK_MAX_TOKENS are split into overlapping windows. Tokens are
+# whitespace-delimited words; all-MiniLM-L6-v2 truncates input at 256 word pieces, which
+# 160 words stays safely under. Consecutive windows share CHUNK_OVERLAP_TOKENS words so a
+# sentence cut at a window boundary is still retrievable in one piece.
+CHUNK_MAX_TOKENS = 160
+CHUNK_OVERLAP_TOKENS = 32
+
+_TOKEN_RE = re.compile(r"\S+")
+
+def split_into_windows(text: str, max_tokens: int = CHUNK_MAX_TOKENS,
+                       overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Iterator[str]:
+    """
+    Yields `text` unchanged if it has at most `max_tokens` tokens, otherwise overlapping windows
+    of `max_tokens` tokens. Windows are sliced from the original text, so line breaks inside a
+    paragraph (e.g. list items) are preserved.
+    """
+    spans = [m.span() for m in _TOKEN_RE.finditer(text)]
+    if len(spans) <= max_tokens:
+        yield text
+        return
+    step = max(1, max_tokens - overlap_tokens)
+    for first in range(0, len(spans), step):
+        last = min(first + max_tokens, len(spans)) - 1
+        yield text[spans[first][0]:spans[last][1]]
+        if last == len(spans) - 1:
+            return
+
+def iter_chunks(file_path: str, max_tokens: int = CHUNK_MAX_TOKENS,
+                overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Iterator[Dict]:
+    """
+    Streams a source file line by line and lazily yields chunks with 'content' and 'metadata'.
+
+    Each "### SECTION: <title> ###" line starts a new section and each blank line ends a
+    paragraph. Every paragraph becomes one chunk, or several overlapping windows if it is
+    longer than `max_tokens`; all of them carry the section's `section_title`. A section
+    without any paragraphs yields its title as a chunk. Raises FileNotFoundError on first
+    iteration if the file does not exist.
+    """
+    source_file = os.path.basename(file_path)
+    title: Optional[str] = None
+    chunk_index = 0
+    paragraph_index = 0
+    lines: List[str] = []
+
+    def flush_paragraph() -> Iterator[Dict]:
+        nonlocal chunk_index, paragraph_index
+        paragraph = "\n".join(lines).strip()
+        lines.clear()
+        if not paragraph:
+            return
+        windows = list(split_into_windows(paragraph, max_tokens, overlap_tokens))
+        for window_index, window in enumerate(windows):
+            metadata = {"source_file": source_file, "section_title": title, "chunk_id_in_section": chunk_index}
+            if len(windows) > 1:
+                metadata.update({"paragraph_id_in_section": paragraph_index, "window_in_paragraph": window_index})
+            chunk_index += 1
+            yield {"content": window, "metadata": metadata}
+        paragraph_index += 1
+
+    def end_section() -> Iterator[Dict]:
+        yield from flush_paragraph()
+        if title and chunk_index == 0:
+            # A section that only had a title: add the title itself as a chunk
+            yield {
+                "content": title,
+                "metadata": {"source_file": source_file, "section_title": title, "chunk_type": "title"}
+            }
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            stripped = line.strip()
+            if stripped.startswith(SECTION_DELIMITER):
+                if title is not None:
+                    yield from end_section()
+                title = stripped[len(SECTION_DELIMITER):].replace("###", "").strip()
+                chunk_index = paragraph_index = 0
+                lines.clear()
+            elif title is None:
+                # Text before the first section header: its first line acts as the title
+                if stripped:
+                    title = stripped.replace("###", "").strip()
+            elif stripped:
+                lines.append(line)
+            else:
+                yield from flush_paragraph()
+    if title is not None:
+        yield from end_section()
 
 def load_and_chunk_data(file_path: str) -> List[Dict[str, str]]:
     """
@@ -36,109 +150,370 @@ def load_and_chunk_data(file_path: str) -> List[Dict[str, str]]:
     """
     print(f"Loading and chunking data from: {file_path}")
     chunks_with_metadata = []
-    
+
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            full_text = f.read()
-
-        sections = full_text.split(SECTION_DELIMITER)
-        
-        # Process each section
-        for section_id, section_content in enumerate(sections):
-            if not section_content.strip():
-                continue
-
-            # Extract section title (e.g., " PRODUCT OVERVIEW ###")
-            first_line_break = section_content.find('\n')
-            if first_line_break != -1:
-                title = section_content[:first_line_break].strip().replace("###", "").strip()
-                content_after_title = section_content[first_line_break:].strip()
-            else: # If no newline, assume the whole section_content is the title
-                title = section_content.strip().replace("###", "").strip()
-                content_after_title = ""
-
-            # Split the section content into paragraphs or smaller chunks
-            paragraphs = [p.strip() for p in content_after_title.split(PARAGRAPH_DELIMITER) if p.strip()]
-            
-            if not paragraphs and title: # If a section only had a title but no content, add the title itself as a chunk
-                 chunks_with_metadata.append({
-                    "content": title,
-                    "metadata": {"source_file": os.path.basename(file_path), "section_title": title, "chunk_type": "title"}
-                })
-                 continue
-
-            for i, paragraph in enumerate(paragraphs):
-                # You could further split very long paragraphs here if needed
-                # For now, each paragraph is a chunk.
-                chunks_with_metadata.append({
-                    "content": paragraph,
-                    "metadata": {
-                        "source_file": os.path.basename(file_path),
-                        "section_title": title,
-                        "chunk_id_in_section": i
-                    }
-                })
+        chunks_with_metadata = list(iter_chunks(file_path))
         print(f"Finished chunking {len(chunks_with_metadata)} chunks from {file_path}.")
     except FileNotFoundError:
         print(f"Error: File not found at {file_path}")
     except Exception as e:
         print(f"An error occurred while loading/chunking {file_path}: {e}")
-    
+
     return chunks_with_metadata
 
-def create_chroma_db(chunks: List[Dict[str, str]], db_path: str, collection_name: str, model: SentenceTransformer):
+def chunk_id(collection_name: str, chunk: Dict) -> str:
     """
-    Creates or updates a ChromaDB collection with the given chunks.
+    Derives a stable, content-addressed ID for a chunk. The ID only changes when the chunk's
+    text, section or source file changes, so unchanged chunks keep their stored embeddings.
+    """
+    metadata = chunk['metadata']
+    key = "\x1f".join([metadata.get("source_file", ""), metadata.get("section_title", ""), chunk['content']])
+    return f"{collection_name}_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}"
+
+ADD_SAMPLE_SIZE = 50 # New/changed chunks kept for the plan listing (only counts are kept beyond that)
+
+def new_ingestion_plan() -> Dict:
+    return {"add": 0, "add_sample": [], "update_metadata": [], "unchanged": 0, "delete": []}
+
+def plan_ingestion(chunks: Iterable[Dict], collection_name: str, stored_metadatas: Dict[str, Dict],
+                   plan: Dict, reembed_all: bool = False,
+                   sample_size: int = ADD_SAMPLE_SIZE) -> Iterator[Tuple[str, Dict]]:
+    """
+    Diffs the chunks produced from the source files against what is already stored, yielding
+    the (id, chunk) pairs to embed and upsert as they are found so they can be streamed
+    straight into embed_and_upsert.
+
+    Args:
+        chunks: Chunks from iter_chunks, consumed lazily
+        collection_name: Name of the collection (used as ID prefix)
+        stored_metadatas: Mapping of stored chunk ID -> metadata
+        plan: Dict from new_ingestion_plan, filled in while the generator is consumed: 'add'
+            (count of new/changed chunks, the first `sample_size` of them in 'add_sample'),
+            'update_metadata' ((id, metadata) of stored chunks whose text is unchanged but whose
+            metadata, e.g. position in section, changed), 'unchanged' (count) and 'delete'
+            (stale IDs, only complete once the generator is exhausted)
+        reembed_all: Treat every chunk as changed, e.g. because the embedding model changed
+    """
+    seen = set()
+    for chunk in chunks:
+        id_ = chunk_id(collection_name, chunk)
+        if id_ in seen:  # Identical paragraph repeated within a section
+            continue
+        seen.add(id_)
+        if reembed_all or id_ not in stored_metadatas:
+            plan["add"] += 1
+            if len(plan["add_sample"]) < sample_size:
+                plan["add_sample"].append((id_, chunk))
+            yield id_, chunk
+        elif stored_metadatas[id_] != chunk['metadata']:
+            plan["update_metadata"].append((id_, chunk['metadata']))
+        else:
+            plan["unchanged"] += 1
+    plan["delete"] = [id_ for id_ in stored_metadatas if id_ not in seen]
+
+def count_additions(chunks: Iterable[Dict], collection_name: str, stored_metadatas: Dict[str, Dict],
+                    reembed_all: bool = False) -> int:
+    """Counts the chunks plan_ingestion would yield, holding only their IDs."""
+    plan = new_ingestion_plan()
+    for _ in plan_ingestion(chunks, collection_name, stored_metadatas, plan, reembed_all=reembed_all, sample_size=0):
+        pass
+    return plan["add"]
+
+def print_ingestion_summary(collection_name: str, plan: Dict, dry_run: bool, max_lines: int = ADD_SAMPLE_SIZE) -> None:
+    prefix = "[DRY RUN] " if dry_run else ""
+    print(f"{prefix}Ingestion plan for '{collection_name}': "
+          f"{plan['add']} new/changed, {len(plan['update_metadata'])} metadata-only updates, "
+          f"{plan['unchanged']} unchanged, {len(plan['delete'])} stale to delete.")
+    lines = [f"  + {id_} [{chunk['metadata'].get('section_title', '')}] {chunk['content'][:60]!r}"
+             for id_, chunk in plan["add_sample"][:max_lines]]
+    lines += [f"  - {id_}" for id_ in plan["delete"][:max_lines - len(lines)]]
+    for line in lines:
+        print(f"{prefix}{line}")
+    total_lines = plan["add"] + len(plan["delete"])
+    if total_lines > len(lines):
+        print(f"{prefix}  ... and {total_lines - len(lines)} more")
+
+def tag_embedding_model(collection: chromadb.Collection, model_id: str) -> None:
+    """Records in the collection's metadata which embedding model produced its embeddings."""
+    metadata = dict(collection.metadata or {})
+    if metadata.get(EMBEDDING_MODEL_METADATA_KEY) == model_id:
+        return
+    metadata[EMBEDDING_MODEL_METADATA_KEY] = model_id
+    try:
+        collection.modify(metadata=metadata)
+    except Exception:
+        # Chroma >= 1.0 rejects distance-function keys in modify(); it keeps them in the
+        # collection configuration instead, so they can be left out.
+        collection.modify(metadata={k: v for k, v in metadata.items() if not k.startswith("hnsw:")})
+
+def create_chroma_db(chunks: Iterable[Dict], db_path: str, collection_name: str,
+                     model: Optional[OnnxEmbeddingModel] = None, dry_run: bool = False,
+                     pipeline_options: Optional[Dict] = None) -> Dict:
+    """
+    Creates or incrementally updates a ChromaDB collection with the given chunks (any iterable,
+    e.g. the iter_chunks generator).
+
+    Only new or changed chunks are embedded and upserted, streamed from the chunks as they are
+    diffed; chunks that no longer exist in the source files are deleted. If the collection was
+    embedded with a different model (or does not record one), every chunk is re-embedded. With
+    dry_run=True nothing is written and the plan is only printed.
+    If `chunks` can be iterated more than once (e.g. a ChunkSource or a list), a first pass that
+    only hashes chunk IDs counts the additions for the progress total.
+    pipeline_options are passed to embed_and_upsert (batch_size, workers, queue_size).
     """
     print(f"Creating/updating Chroma DB at '{db_path}' for collection '{collection_name}'...")
-    os.makedirs(db_path, exist_ok=True)
-    
-    client = chromadb.PersistentClient(path=db_path)
-    collection = client.get_or_create_collection(name=collection_name)
-    
-    # Clear existing data in the collection if you want to rebuild it every time
-    # collection.delete(ids=[id_ for id_ in collection.get()['ids']]) # Dangerous if you have other data!
-    # A safer approach for full rebuilds is to delete the whole directory before running the script.
-    
-    documents = [c['content'] for c in chunks]
-    metadatas = [c['metadata'] for c in chunks]
-    ids = [f"{collection_name}_{i}" for i in range(len(chunks))]
-
-    print(f"Generating embeddings for {len(documents)} documents...")
-    embeddings = model.encode(documents).tolist() # Convert numpy array to list for Chroma
-    print("Embeddings generated.")
-
-    print(f"Adding documents to collection '{collection_name}'...")
-    collection.add(
-        embeddings=embeddings,
-        documents=documents,
-        metadatas=metadatas,
-        ids=ids
+
+    model = model or get_embedding_model()
+    collection = None
+    stored_metadatas: Dict[str, Dict] = {}
+    reembed_all = False
+    if os.path.exists(db_path) or not dry_run:
+        os.makedirs(db_path, exist_ok=True)
+        client = chromadb.PersistentClient(path=db_path)
+        collection = client.get_or_create_collection(name=collection_name)
+        stored = collection.get(include=["metadatas"])
+        stored_metadatas = {id_: (metadata or {}) for id_, metadata in zip(stored["ids"], stored["metadatas"])}
+        stored_model_id = (collection.metadata or {}).get(EMBEDDING_MODEL_METADATA_KEY)
+        if stored_metadatas and stored_model_id != model.model_id:
+            print(f"Stored embeddings come from {stored_model_id or 'an unrecorded model'}, "
+                  f"not {model.model_id}: re-embedding every chunk.")
+            reembed_all = True
+
+    plan = new_ingestion_plan()
+    additions = plan_ingestion(chunks, collection_name, stored_metadatas, plan, reembed_all=reembed_all)
+    if dry_run:
+        for _ in additions:
+            pass
+        print_ingestion_summary(collection_name, plan, dry_run)
+        return plan
+
+    total = None
+    if iter(chunks) is not chunks:  # Re-iterable, so the additions can be counted up front
+        total = count_additions(chunks, collection_name, stored_metadatas, reembed_all=reembed_all)
+    if total == 0:
+        for _ in additions:  # Nothing to embed, but the plan still needs the updates and stale IDs
+            pass
+    else:
+        print(f"Embedding and upserting {total if total is not None else 'new/changed'} documents into '{collection_name}'...")
+        embed_and_upsert(collection, additions, total=total, model=model, **(pipeline_options or {}))
+    print_ingestion_summary(collection_name, plan, dry_run)
+
+    if plan["update_metadata"]:
+        collection.update(
+            ids=[id_ for id_, _ in plan["update_metadata"]],
+            metadatas=[metadata for _, metadata in plan["update_metadata"]]
+        )
+
+    if plan["delete"]:
+        collection.delete(ids=plan["delete"])
+
+    tag_embedding_model(collection, model.model_id)
+
+    print(f"Collection '{collection_name}' now holds {collection.count()} documents.")
+
+    # Build the keyword (BM25) index over everything now stored in the collection,
+    # so hybrid retrieval uses exactly the same chunk ids as the vector index.
+    print(f"Building lexical index for '{collection_name}'...")
+    lexical_index = BM25Index.from_collection(collection)
+    lexical_index.save(os.path.join(db_path, LEXICAL_INDEX_FILENAME))
+    print(f"Lexical index with {len(lexical_index)} chunks written to '{db_path}'.")
+    return plan
+
+# --- Embedding Pipeline ---
+_worker_model: Optional[OnnxEmbeddingModel] = None
+
+def _init_embedding_worker(model_dir: Optional[str], quantized: bool) -> None:
+    """Loads the embedding model once per worker process, limited to one thread per process."""
+    global _worker_model
+    _worker_model = OnnxEmbeddingModel(model_dir=model_dir, quantized=quantized, threads=1)
+    _worker_model.load()
+
+def _embed_batch(documents: List[str]) -> np.ndarray:
+    return _worker_model.encode(documents, batch_size=len(documents))
+
+def _batched(items: Iterable[Tuple[str, Dict]], batch_size: int) -> Iterator[List[Tuple[str, Dict]]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class _ProgressReporter:
+    """Prints embedding progress and throughput."""
+
+    def __init__(self, total: Optional[int]):
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def update(self, count: int) -> None:
+        self.done += count
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        of_total = f"/{self.total}" if self.total else ""
+        print(f"  Embedded and stored {self.done}{of_total} chunks ({rate:.1f} chunks/s)")
+
+def embed_and_upsert(collection: chromadb.Collection, items: Iterable[Tuple[str, Dict]], total: Optional[int] = None,
+                     model: Optional[OnnxEmbeddingModel] = None, batch_size: int = EMBEDDING_BATCH_SIZE,
+                     workers: int = EMBEDDING_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE) -> int:
+    """
+    Streams (id, chunk) pairs through a batched embedding pipeline into Chroma.
+
+    Stage 1 groups chunks into batches as they are read from `items`; stage 2 embeds batches on
+    `workers` processes (or in-process when workers <= 1); stage 3 is a writer thread that upserts
+    finished batches. Each hand-off holds at most `queue_size` batches.
+
+    Returns:
+        int: Number of chunks written
+    """
+    model = model or get_embedding_model()
+    write_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    progress = _ProgressReporter(total)
+    writer_errors: List[BaseException] = []
+
+    def writer() -> None:
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            if writer_errors:
+                continue  # Keep draining so the producer never blocks on a dead writer
+            batch, embeddings = item
+            try:
+                collection.upsert(
+                    ids=[id_ for id_, _ in batch],
+                    documents=[chunk['content'] for _, chunk in batch],
+                    metadatas=[chunk['metadata'] for _, chunk in batch],
+                    embeddings=embeddings.tolist()
+                )
+                progress.update(len(batch))
+            except BaseException as e:
+                writer_errors.append(e)
+
+    writer_thread = threading.Thread(target=writer, name="chroma-writer", daemon=True)
+    writer_thread.start()
+    try:
+        if workers <= 1:
+            for batch in _batched(items, batch_size):
+                documents = [chunk['content'] for _, chunk in batch]
+                write_queue.put((batch, model.encode(documents, batch_size=len(documents))))
+        else:
+            # Download/quantize once here, not concurrently in every worker
+            model.prepare_model_files()
+            print(f"Starting {workers} embedding worker processes (batch size {batch_size})...")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_embedding_worker,
+                                     initargs=(model.model_dir, model.quantized)) as pool:
+                pending = deque()
+                for batch in _batched(items, batch_size):
+                    if len(pending) >= queue_size:
+                        done_batch, future = pending.popleft()
+                        write_queue.put((done_batch, future.result()))
+                    pending.append((batch, pool.submit(_embed_batch, [chunk['content'] for _, chunk in batch])))
+                while pending:
+                    done_batch, future = pending.popleft()
+                    write_queue.put((done_batch, future.result()))
+    finally:
+        write_queue.put(None)
+        writer_thread.join()
+
+    if writer_errors:
+        raise writer_errors[0]
+    return progress.done
+
+def export_collection_bundle(db_path: str, collection_name: str, dtype: str = "float32") -> Dict:
+    """
+    Exports a collection to its compact, memory-mappable bundle next to the database
+    (e.g. chroma_dbs/product_info_db.bundle), served with KB_RETRIEVAL_BACKEND=bundle.
+    """
+    bundle_path = bundle_path_for(db_path)
+    print(f"Exporting '{collection_name}' to bundle '{bundle_path}' ({dtype})...")
+    collection = chromadb.PersistentClient(path=db_path).get_collection(name=collection_name)
+    manifest = export_bundle(
+        collection, bundle_path, dtype=dtype,
+        embedding_model=(collection.metadata or {}).get(EMBEDDING_MODEL_METADATA_KEY),
+        lexical_index_file=os.path.join(db_path, LEXICAL_INDEX_FILENAME)
     )
-    print(f"Successfully added {len(documents)} documents to '{collection_name}'.")
+    bundle_bytes = sum(f["bytes"] for f in manifest["files"].values())
+    db_bytes = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(db_path) for name in names)
+    print(f"Bundle with {manifest['count']} chunks written: {bundle_bytes / 1024:.0f} KiB "
+          f"(Chroma database: {db_bytes / 1024:.0f} KiB).")
+    return manifest
+
+class ChunkSource:
+    """A source file's chunks that can be iterated more than once, re-reading the file each time."""
+
+    def __init__(self, file_path: str, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        self.file_path = file_path
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter_chunks(self.file_path, max_tokens=self.max_tokens, overlap_tokens=self.overlap_tokens)
+
+def ingest_file(file_path: str, db_path: str, collection_name: str, model: Optional[OnnxEmbeddingModel] = None,
+                dry_run: bool = False, pipeline_options: Optional[Dict] = None, max_tokens: int = CHUNK_MAX_TOKENS,
+                overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Optional[Dict]:
+    """
+    Streams a source file through the chunker into its collection. Skips the collection
+    (rather than deleting everything stored in it) if the file is missing or yields no chunks.
+    """
+    print(f"Streaming chunks from: {file_path}")
+    chunks = ChunkSource(file_path, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    try:
+        first_chunk = next(iter(chunks), None)
+    except FileNotFoundError:
+        print(f"Error: File not found at {file_path}")
+        first_chunk = None
+    if first_chunk is None:
+        print(f"No chunks found for {file_path}. Skipping DB creation for '{collection_name}'.")
+        return None
+    return create_chroma_db(chunks, db_path, collection_name,
+                            model=model, dry_run=dry_run, pipeline_options=pipeline_options)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or incrementally update the EcoHarvest knowledge bases.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only print which chunks would be added, updated or deleted.")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE,
+                        help="Chunks embedded per batch.")
+    parser.add_argument("--workers", type=int, default=EMBEDDING_WORKERS,
+                        help="Embedding worker processes (1 embeds in the main process).")
+    parser.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE,
+                        help="Maximum batches buffered between pipeline stages.")
+    parser.add_argument("--chunk-tokens", type=int, default=CHUNK_MAX_TOKENS,
+                        help="Paragraphs longer than this many words are split into overlapping windows.")
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP_TOKENS,
+                        help="Words shared by consecutive windows of a split paragraph.")
+    parser.add_argument("--export-bundle", action="store_true",
+                        help="Also export each collection to a memory-mappable bundle for KB_RETRIEVAL_BACKEND=bundle.")
+    parser.add_argument("--bundle-dtype", choices=BUNDLE_DTYPES, default="float32",
+                        help="Embedding precision in the bundle (float16 halves the matrix).")
+    parser.add_argument("--quantized", action=argparse.BooleanOptionalAction, default=EMBEDDING_QUANTIZED,
+                        help="Embed with the int8-quantized model (serving must set EMBEDDING_QUANTIZED=true to match). "
+                             "Defaults to EMBEDDING_QUANTIZED; --no-quantized overrides it.")
+    args = parser.parse_args()
+    model = OnnxEmbeddingModel(model_dir=EMBEDDING_MODEL_DIR, quantized=args.quantized)
+    chunking_options = {"max_tokens": args.chunk_tokens, "overlap_tokens": args.chunk_overlap}
+    pipeline_options = {"batch_size": args.batch_size, "workers": args.workers, "queue_size": args.queue_size}
+
     # Create the data directory if it doesn't exist (for where you put your .txt files)
     os.makedirs(DATA_DIR, exist_ok=True)
-    
-    print("Loading embedding model...")
-    embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-    print("Embedding model loaded.")
 
     # --- Process Product Info ---
-    product_chunks = load_and_chunk_data(PRODUCT_INFO_FILE)
-    if product_chunks:
-        create_chroma_db(product_chunks, PRODUCT_CHROMA_PATH, PRODUCT_COLLECTION_NAME, embedding_model)
-    else:
-        print(f"No chunks found for {PRODUCT_INFO_FILE}. Skipping DB creation for product info.")
+    product_plan = ingest_file(PRODUCT_INFO_FILE, PRODUCT_CHROMA_PATH, PRODUCT_COLLECTION_NAME, model=model,
+                               dry_run=args.dry_run, pipeline_options=pipeline_options, **chunking_options)
+    if product_plan is not None and args.export_bundle and not args.dry_run:
+        export_collection_bundle(PRODUCT_CHROMA_PATH, PRODUCT_COLLECTION_NAME, dtype=args.bundle_dtype)
 
     print("-" * 50)
 
     # --- Process Support Info ---
-    support_chunks = load_and_chunk_data(SUPPORT_INFO_FILE)
-    if support_chunks:
-        create_chroma_db(support_chunks, SUPPORT_CHROMA_PATH, SUPPORT_COLLECTION_NAME, embedding_model)
-    else:
-        print(f"No chunks found for {SUPPORT_INFO_FILE}. Skipping DB creation for support info.")
+    support_plan = ingest_file(SUPPORT_INFO_FILE, SUPPORT_CHROMA_PATH, SUPPORT_COLLECTION_NAME, model=model,
+                               dry_run=args.dry_run, pipeline_options=pipeline_options, **chunking_options)
+    if support_plan is not None and args.export_bundle and not args.dry_run:
+        export_collection_bundle(SUPPORT_CHROMA_PATH, SUPPORT_COLLECTION_NAME, dtype=args.bundle_dtype)
 
     print("\nKnowledge base creation process complete.")
\ No newline at end of file
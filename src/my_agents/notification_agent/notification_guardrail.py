@@ -1,38 +1,22 @@
-from agents import input_guardrail, GuardrailFunctionOutput
-from typing import Optional
+from typing import Any
+
+from agents import Agent, input_guardrail, GuardrailFunctionOutput, RunContextWrapper
+from ..shared.guardrail_classifier import input_text
+from ..shared.guardrail_rules import check_rules
 
 @input_guardrail
-def name_guardrail(input_text: str) -> Optional[GuardrailFunctionOutput]:
+def name_guardrail(ctx: RunContextWrapper[Any], agent: Agent, input: Any) -> GuardrailFunctionOutput:
     """
     Validates that the input contains a name and is appropriate for a welcome message.
-    
-    Args:
-        input_text (str): The input text to validate
-        
+
+    The checks are the "notification" rules in shared/guardrail_rules.json: the name length
+    and a list of words that are inappropriate in a welcome message, matched as whole words.
+
     Returns:
-        Optional[GuardrailFunctionOutput]: None if validation passes, or a GuardrailFunctionOutput with error details
+        GuardrailFunctionOutput: Trips the wire with the matched rule as output_info if a rule matches
     """
-    # Check if input is empty or too short
-    if not input_text or len(input_text.strip()) < 2:
-        return GuardrailFunctionOutput(
-            is_valid=False,
-            error_message="Input must contain a valid name (at least 2 characters)."
-        )
-    
-    # Check if input contains inappropriate content
-    inappropriate_words = ["bad", "wrong", "error", "fail", "invalid"]
-    if any(word in input_text.lower() for word in inappropriate_words):
-        return GuardrailFunctionOutput(
-            is_valid=False,
-            error_message="Input contains inappropriate content for a welcome message."
-        )
-    
-    # Check if input is too long (e.g., more than 100 characters)
-    if len(input_text) > 100:
-        return GuardrailFunctionOutput(
-            is_valid=False,
-            error_message="Input is too long. Please provide just the name."
-        )
-    
-    # If all checks pass, return None to indicate valid input
-    return None 
\ No newline at end of file
+    rule_match = check_rules(input_text(input) or "", "notification")
+    return GuardrailFunctionOutput(
+        output_info=rule_match,
+        tripwire_triggered=rule_match is not None
+    )
@@ -1,8 +1,10 @@
 from typing import Dict, Any
-from agents import function_tool
+from agents import function_tool, RunContextWrapper
+from ..shared.guardrails import turn_verdict
+from ..shared.run_context import TurnContext
 
 @function_tool
-def create_and_send_welcome_message(name: str) -> Dict[str, Any]:
+async def create_and_send_welcome_message(ctx: RunContextWrapper[Any], name: str) -> Dict[str, Any]:
     """
     Creates a welcome message for a person and mocks sending it.
     
@@ -12,6 +14,11 @@ def create_and_send_welcome_message(name: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: A dictionary containing the message details and status
     """
+    # Sending cannot be undone: when the guardrail runs speculatively alongside the
+    # answer, wait for the turn's verdict before anything leaves the system.
+    if isinstance(ctx.context, TurnContext) and (await turn_verdict(ctx.context)).is_question_unsafe:
+        return {"status": "blocked", "recipient": name}
+
     welcome_message = f"Welcome {name}! We're excited to have you join our community. We hope you'll find everything you need here."
     
     # Mock sending the message
@@ -7,13 +7,13 @@ from .product_info_agent_tools import query_product_knowledge_base_tool, Product
 from ..shared.guardrails import universal_guardrail
 
 @function_tool
-def _query_product_knowledge_base(query: str) -> str:
+async def _query_product_knowledge_base(query: str) -> str:
     """
     Queries the EcoHarvest product knowledge base to find answers about GrowPod features,
     app capabilities, seed pod varieties, pricing plans, compatibility, warranty, returns,
     and general sales inquiries. Use this tool for any factual question about EcoHarvest products.
     """
-    return query_product_knowledge_base_tool(query)
+    return await query_product_knowledge_base_tool(query)
 
 # Fix: Properly define the instructions variable
 instructions = """You are the EcoHarvest Product Information Agent. Your primary role is to provide detailed and accurate information about all EcoHarvest products, including the GrowPod models, app features, seed pod varieties, pricing, and general policies (warranty, returns, compatibility).
@@ -0,0 +1,323 @@
+# src/my_agents/shared/answer_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from agents import Agent
+from pydantic import BaseModel
+
+from .cache import TTLLRUCache
+from .embeddings import embed_query, normalize_query
+from .guardrail_cache import guardrail_fingerprint
+from .retrieval_cache import SemanticResultCache
+
+# --- Answer Cache Configuration ---
+# Repeated questions are answered from a cache of final answers instead of running the agents
+# again. Entries belong to a namespace derived from the knowledge base versions and from the
+# instructions, model, tools and handoffs of every agent, so a reload or a prompt change never
+# serves answers produced by the old data or agents.
+# "off", "memory" (per process) or "sqlite" (a local file shared by the workers of a host).
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "off").lower()
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ecoharvest_answer_cache.sqlite3"))
+# Also reuse the answer to a near-identical question (after the guardrail has checked the new one)
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "false").lower() in ("1", "true", "yes")
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+# Skip lookups (answers are still stored), e.g. to compare cached answers with fresh ones
+ANSWER_CACHE_BYPASS = os.getenv("ANSWER_CACHE_BYPASS", "false").lower() in ("1", "true", "yes")
+# Request header with the same effect for a single request
+ANSWER_CACHE_BYPASS_HEADER = "x-bypass-answer-cache"
+
+BACKENDS = ("off", "memory", "sqlite")
+# Deletes expired and surplus rows of the sqlite store every N stores
+_SQLITE_PRUNE_EVERY = 100
+
+
+class CachedAnswer(BaseModel):
+    """A final answer and the agent that produced it."""
+    answer: str
+    agent_name: str
+    created_at: float
+
+
+class AnswerHit(BaseModel):
+    """A cache lookup that found an answer."""
+    answer: CachedAnswer
+    semantic: bool = False
+    similarity: float = 1.0
+
+
+def agent_fingerprint(agent: Agent) -> str:
+    """Short hash of an agent's model, output type, instructions, tools and handoffs."""
+    tools = ",".join(sorted(tool.name for tool in agent.tools))
+    handoffs = ",".join(sorted(getattr(handoff, "name", None) or getattr(handoff, "agent_name", "") for handoff in agent.handoffs))
+    signature = "\n".join([agent.name, guardrail_fingerprint(agent), tools, handoffs])
+    return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+
+class SqliteAnswerStore:
+    """
+    Answer store in a local SQLite file, shared by every process that opens the same path.
+    WAL mode lets workers read while another one writes; the store is bounded and pruned periodically.
+
+    Args:
+        path (str): Database file
+        max_entries (int): Maximum number of stored answers
+        ttl_seconds (Optional[float]): Answer lifetime; None or 0 means answers never expire
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stores = 0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS answers_accessed_at ON answers (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        connection = self._connection()
+        row = connection.execute("SELECT value, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl_seconds is not None and created_at + self.ttl_seconds <= time.time():
+            return None
+        with connection:
+            connection.execute("UPDATE answers SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return value
+
+    def set(self, key: str, namespace: str, value: str) -> None:
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO answers (key, namespace, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value, now, now)
+            )
+        with self._lock:
+            self._stores += 1
+            prune = self._stores % _SQLITE_PRUNE_EVERY == 1
+        if prune:
+            self.prune()
+
+    def prune(self) -> None:
+        """
+        Deletes expired answers and the least recently used surplus. Answers of other namespaces are
+        kept: during a rollout or reload, workers on the same file can briefly use different ones,
+        and outdated answers are never looked up, so they age out like any other.
+        """
+        connection = self._connection()
+        with connection:
+            if self.ttl_seconds is not None:
+                connection.execute("DELETE FROM answers WHERE created_at <= ?", (time.time() - self.ttl_seconds,))
+            connection.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM answers")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+class AnswerCache:
+    """
+    Caches final answers by normalized question, starting agent and namespace.
+
+    Args:
+        agents (Sequence[Agent]): Every agent whose configuration can change an answer
+        knowledge_bases (Sequence[KnowledgeBase]): Knowledge bases the answers are drawn from
+        uncacheable_agents (Sequence[Agent]): Agents whose answers are never cached, e.g. agents with side effects
+        backend (str): "off", "memory" or "sqlite"
+    """
+
+    def __init__(self, agents: Sequence[Agent], knowledge_bases: Sequence[Any], uncacheable_agents: Sequence[Agent] = (),
+                 backend: str = ANSWER_CACHE_BACKEND, max_entries: int = ANSWER_CACHE_SIZE,
+                 ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS, path: str = ANSWER_CACHE_PATH,
+                 semantic: bool = ANSWER_CACHE_SEMANTIC, similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD):
+        if backend not in BACKENDS:
+            raise ValueError(f"ANSWER_CACHE_BACKEND must be one of {BACKENDS}, got '{backend}'")
+        self.agents = list(agents)
+        self.knowledge_bases = list(knowledge_bases)
+        self.uncacheable = {agent.name for agent in uncacheable_agents}
+        self.backend = backend
+        self._memory = TTLLRUCache(max_size=max_entries if backend == "memory" else 0, ttl_seconds=ttl_seconds,
+                                   name="answers")
+        self._sqlite = SqliteAnswerStore(path, max_entries, ttl_seconds) if backend == "sqlite" else None
+        # Near-identical questions asked in this process, pointing at the exact entry that answers them.
+        # One index per starting agent: an index drops its entries when its version changes, so with
+        # the local router alternating agents, a shared index would keep wiping the other agents' entries.
+        self.semantic = semantic and self.enabled
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._semantic: Dict[str, SemanticResultCache] = {}
+
+        self._lock = threading.Lock()
+        self._namespace: Optional[str] = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.uncacheable_skips = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "off"
+
+    def namespace(self) -> str:
+        """
+        Hash of the knowledge base versions and agent fingerprints the cached answers belong to.
+        Uses the data published on disk, so an in-place update invalidates answers before any reload.
+        """
+        parts = [f"{kb.domain}={kb.published_version()}" for kb in self.knowledge_bases]
+        parts += [agent_fingerprint(agent) for agent in self.agents]
+        namespace = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            if namespace != self._namespace:
+                if self._namespace is not None:
+                    self.invalidations += 1
+                    self._memory.clear()
+                    print("[DEBUG] Answer cache invalidated: knowledge base or agent configuration changed")
+                self._namespace = namespace
+        return namespace
+
+    @staticmethod
+    def _key(namespace: str, agent: Agent, question: str) -> str:
+        return hashlib.sha256(f"{namespace}\n{agent.name}\n{normalize_query(question)}".encode("utf-8")).hexdigest()
+
+    def _semantic_index(self, agent: Agent) -> SemanticResultCache:
+        with self._lock:
+            index = self._semantic.get(agent.name)
+            if index is None:
+                index = SemanticResultCache(self.max_entries, self.similarity_threshold,
+                                            name=f"answer_questions_{agent.name}")
+                self._semantic[agent.name] = index
+        return index
+
+    def _get(self, key: str) -> Optional[CachedAnswer]:
+        if self._sqlite is not None:
+            value = self._sqlite.get(key)
+            return CachedAnswer(**json.loads(value)) if value is not None else None
+        return self._memory.get(key)
+
+    def lookup(self, question: str, agent: Agent, bypass: bool = False) -> Optional[AnswerHit]:
+        """
+        Returns the cached answer to `question` when `agent` starts the run, or None.
+        Blocking (sqlite reads, query embedding for semantic matches); call it off the event loop.
+
+        Args:
+            question (str): The user's message
+            agent (Agent): The agent that would answer it, e.g. the triage agent
+            bypass (bool): Skip the lookup, e.g. for a request with the bypass header
+        """
+        if not self.enabled:
+            return None
+        if bypass or ANSWER_CACHE_BYPASS:
+            with self._lock:
+                self.bypassed += 1
+            return None
+        namespace = self.namespace()
+        key = self._key(namespace, agent, question)
+        cached = self._get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return AnswerHit(answer=cached)
+
+        if self.semantic:
+            match = self._semantic_index(agent).lookup(namespace, embed_query(normalize_query(question)))
+            if match is not None:
+                similar_key, similarity = match
+                cached = self._get(similar_key)
+                if cached is not None:
+                    with self._lock:
+                        self.semantic_hits += 1
+                    return AnswerHit(answer=cached, semantic=True, similarity=similarity)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, question: str, agent: Agent, result: Any) -> bool:
+        """
+        Caches the final output of a finished run, unless it is not plain text or came from an
+        uncacheable agent (such as one that sends notifications). Returns whether it was stored.
+        Blocking; call it off the event loop.
+        """
+        if not self.enabled:
+            return False
+        last_agent = getattr(result.last_agent, "name", "")
+        if not isinstance(result.final_output, str) or not result.final_output or last_agent in self.uncacheable \
+                or agent.name in self.uncacheable:
+            with self._lock:
+                self.uncacheable_skips += 1
+            return False
+        namespace = self.namespace()
+        key = self._key(namespace, agent, question)
+        cached = CachedAnswer(answer=result.final_output, agent_name=last_agent, created_at=time.time())
+        if self._sqlite is not None:
+            self._sqlite.set(key, namespace, cached.model_dump_json())
+        else:
+            self._memory.set(key, cached)
+        if self.semantic:
+            self._semantic_index(agent).store(namespace, embed_query(normalize_query(question)), key)
+        with self._lock:
+            self.stores += 1
+        return True
+
+    def clear(self) -> None:
+        self._memory.clear()
+        with self._lock:
+            indexes = list(self._semantic.values())
+        for index in indexes:
+            index.clear()
+        if self._sqlite is not None:
+            self._sqlite.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss, bypass and store counters, plus the backend's size."""
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            stats = {
+                "backend": self.backend,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "bypassed": self.bypassed,
+                "stores": self.stores,
+                "uncacheable_skips": self.uncacheable_skips,
+                "invalidations": self.invalidations,
+            }
+        stats["size"] = len(self._sqlite) if self._sqlite is not None else len(self._memory)
+        return stats
@@ -0,0 +1,87 @@
+# src/my_agents/shared/cache.py
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLLRUCache:
+    """
+    A thread-safe, bounded LRU cache with optional time-to-live expiry.
+
+    Args:
+        max_size (int): Maximum number of entries. 0 disables the cache entirely.
+        ttl_seconds (Optional[float]): Entry lifetime in seconds. None or 0 means entries never expire.
+        name (str): Name reported in stats, useful when several caches are logged together.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None, name: str = "cache"):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds or None
+        self.name = name
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for `key`, or None on a miss or expired entry."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores `value` under `key`, evicting the least recently used entry if the cache is full."""
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/eviction counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,107 @@
+# src/my_agents/shared/context_packing.py
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Rough characters-per-token ratio for English text with the GPT tokenizers.
+CHARS_PER_TOKEN = 4
+# Two chunks from the same section are treated as duplicates when this share of the
+# shorter chunk's word 3-grams also appears in the other chunk.
+DUPLICATE_OVERLAP_THRESHOLD = 0.8
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class PackedContext(BaseModel):
+    """Chunks selected for the prompt, in rank order."""
+    documents: List[str] = Field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = Field(default_factory=list)
+    distances: List[Optional[float]] = Field(default_factory=list)
+    tokens: int = 0
+    dropped_by_distance: int = 0
+    dropped_as_duplicate: int = 0
+    dropped_by_budget: int = 0
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens in `text`."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _overlaps(a: set, b: set) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / min(len(a), len(b)) >= DUPLICATE_OVERLAP_THRESHOLD
+
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip() + " ..."
+
+
+def pack_context(documents: List[str], metadatas: List[Dict[str, Any]], distances: List[Optional[float]],
+                 max_distance: Optional[float], token_budget: int, segment_overhead_tokens: int = 0) -> PackedContext:
+    """
+    Selects retrieved chunks for the prompt.
+
+    Chunks are processed best-first: those farther than `max_distance` are dropped (chunks
+    without a distance, i.e. keyword-only matches, are kept), chunks that largely repeat a
+    higher-ranked chunk from the same `section_title` are dropped, and the rest are added
+    while they fit in `token_budget`. The best chunk is truncated rather than dropped if it
+    alone exceeds the budget, so a relevant hit always reaches the agent.
+
+    Args:
+        documents (List[str]): Retrieved chunk texts, best first
+        metadatas (List[Dict[str, Any]]): Metadata of each chunk
+        distances (List[Optional[float]]): Cosine distance of each chunk
+        max_distance (Optional[float]): Maximum cosine distance to keep; None disables the filter
+        token_budget (int): Maximum estimated tokens for all kept chunks
+        segment_overhead_tokens (int): Tokens added per chunk by the caller's formatting
+
+    Returns:
+        PackedContext: The kept chunks and counts of what was dropped and why
+    """
+    packed = PackedContext()
+    kept_shingles: Dict[Any, List[set]] = {}
+
+    for i, document in enumerate(documents):
+        metadata = metadatas[i] if i < len(metadatas) and metadatas[i] else {}
+        distance = distances[i] if i < len(distances) else None
+
+        if max_distance is not None and distance is not None and distance > max_distance:
+            packed.dropped_by_distance += 1
+            continue
+
+        section = metadata.get("section_title")
+        shingles = _shingles(document)
+        if any(_overlaps(shingles, other) for other in kept_shingles.get(section, [])):
+            packed.dropped_as_duplicate += 1
+            continue
+
+        cost = estimate_tokens(document) + segment_overhead_tokens
+        if packed.tokens + cost > token_budget:
+            remaining = token_budget - packed.tokens - segment_overhead_tokens
+            if packed.documents or remaining <= 0:
+                packed.dropped_by_budget += 1
+                continue
+            document = _truncate_to_tokens(document, remaining)
+            cost = estimate_tokens(document) + segment_overhead_tokens
+
+        kept_shingles.setdefault(section, []).append(shingles)
+        packed.documents.append(document)
+        packed.metadatas.append(metadata)
+        packed.distances.append(distance)
+        packed.tokens += cost
+
+    return packed
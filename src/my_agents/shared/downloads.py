@@ -0,0 +1,270 @@
+# src/my_agents/shared/downloads.py
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, unquote
+
+from pydantic import BaseModel
+
+from .kb_bundle import sha256_file
+
+# --- Download Configuration ---
+# Knowledge base artifacts are fetched concurrently; cold start is bounded by the
+# slowest file instead of the sum of all of them.
+KB_DOWNLOAD_WORKERS = int(os.getenv("KB_DOWNLOAD_WORKERS", "4"))
+# Optional mirror to download from instead of the default URLs: a local directory,
+# a file:// URL or an http(s) base URL holding MIRROR_MANIFEST_FILENAME and the files it lists.
+KB_MIRROR = os.getenv("KB_MIRROR")
+KB_DOWNLOAD_TIMEOUT_SECONDS = float(os.getenv("KB_DOWNLOAD_TIMEOUT_SECONDS", "60"))
+# Artifacts without a SHA-256 cannot be verified; they are downloaded with a warning, or refused if this is set.
+KB_REQUIRE_CHECKSUMS = os.getenv("KB_REQUIRE_CHECKSUMS", "false").lower() in ("1", "true", "yes")
+
+MIRROR_MANIFEST_FILENAME = "artifacts.json"
+PART_SUFFIX = ".part"
+# Written next to a verified file so later start-ups can skip re-hashing it while it is unchanged.
+VERIFIED_SUFFIX = ".verified"
+_COPY_CHUNK_SIZE = 1 << 20
+
+
+class DownloadArtifact(BaseModel):
+    """A file to download, with the checksum it must match once complete."""
+    path: str  # Relative to the destination directory
+    url: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+
+
+class DownloadResult(BaseModel):
+    path: str
+    status: str  # "present", "downloaded" or "failed"
+    bytes: int = 0
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+
+
+class ChecksumMismatchError(ValueError):
+    """A downloaded file does not match the size or checksum in the manifest."""
+
+
+class UnverifiedArtifactError(ValueError):
+    """An artifact has no checksum to verify its download against."""
+
+
+def _local_path(url: str) -> Optional[str]:
+    """Returns the filesystem path for file:// URLs and plain paths, or None for remote URLs."""
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return unquote(parsed.path)
+    if parsed.scheme in ("http", "https"):
+        return None
+    return url  # A plain path (on Windows, "C:\\..." parses with the drive letter as scheme)
+
+
+def _join_url(base: str, relative_path: str) -> str:
+    local = _local_path(base)
+    if local is not None:
+        return os.path.join(local, *relative_path.split("/"))
+    return f"{base.rstrip('/')}/{relative_path}"
+
+
+def write_mirror_manifest(root: str) -> Dict:
+    """
+    Lists every file under `root` with its size and SHA-256 in root/artifacts.json, so the
+    directory can be served (or copied) as a mirror.
+    """
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            if name == MIRROR_MANIFEST_FILENAME or name.endswith((PART_SUFFIX, VERIFIED_SUFFIX)):
+                continue
+            path = os.path.join(directory, name)
+            relative_path = os.path.relpath(path, root).replace(os.sep, "/")
+            files[relative_path] = {"sha256": sha256_file(path), "bytes": os.path.getsize(path)}
+    manifest = {"files": files}
+    with open(os.path.join(root, MIRROR_MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def mirror_artifacts(mirror: str) -> List[DownloadArtifact]:
+    """Reads a mirror's manifest and returns one checksummed artifact per listed file."""
+    manifest_url = _join_url(mirror, MIRROR_MANIFEST_FILENAME)
+    local = _local_path(manifest_url)
+    if local is not None:
+        with open(local, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    else:
+        import requests
+        response = requests.get(manifest_url, timeout=KB_DOWNLOAD_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        manifest = response.json()
+    return [
+        DownloadArtifact(path=path, url=_join_url(mirror, path), sha256=entry.get("sha256"), size=entry.get("bytes"))
+        for path, entry in sorted(manifest["files"].items())
+    ]
+
+
+def _verify(path: str, artifact: DownloadArtifact) -> None:
+    size = os.path.getsize(path)
+    if artifact.size is not None and size != artifact.size:
+        raise ChecksumMismatchError(f"{artifact.path}: expected {artifact.size} bytes, got {size}")
+    if artifact.sha256 is not None and sha256_file(path) != artifact.sha256:
+        raise ChecksumMismatchError(f"{artifact.path}: SHA-256 does not match the manifest")
+
+
+def _stamp(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _is_complete(dest: str, artifact: DownloadArtifact) -> bool:
+    """True if dest exists and matches the artifact, using the verified stamp to avoid re-hashing."""
+    if not os.path.exists(dest):
+        return False
+    if artifact.sha256 is None:
+        return artifact.size is None or os.path.getsize(dest) == artifact.size
+    verified_file = dest + VERIFIED_SUFFIX
+    if os.path.exists(verified_file):
+        with open(verified_file, "r", encoding="utf-8") as f:
+            if f.read().strip() == f"{artifact.sha256} {_stamp(dest)}":
+                return True
+    try:
+        _verify(dest, artifact)
+    except ChecksumMismatchError:
+        return False
+    _mark_verified(dest, artifact)
+    return True
+
+
+def _mark_verified(dest: str, artifact: DownloadArtifact) -> None:
+    if artifact.sha256 is not None:
+        with open(dest + VERIFIED_SUFFIX, "w", encoding="utf-8") as f:
+            f.write(f"{artifact.sha256} {_stamp(dest)}")
+
+
+def _fetch_local(source: str, part_path: str) -> None:
+    """Copies a local file into part_path, continuing from whatever part_path already holds."""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset > os.path.getsize(source):
+        offset = 0
+    with open(source, "rb") as src, open(part_path, "r+b" if offset else "wb") as dst:
+        src.seek(offset)
+        dst.seek(offset)
+        dst.truncate()
+        shutil.copyfileobj(src, dst, _COPY_CHUNK_SIZE)
+
+
+def _fetch_http(url: str, part_path: str) -> None:
+    """Streams an HTTP(S) download into part_path, resuming with a Range request if it is partial."""
+    import requests
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with requests.get(url, headers=headers, stream=True, timeout=KB_DOWNLOAD_TIMEOUT_SECONDS) as response:
+        if response.status_code == 416:  # Part already holds the whole file
+            return
+        response.raise_for_status()
+        resumed = offset > 0 and response.status_code == 206
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for block in response.iter_content(_COPY_CHUNK_SIZE):
+                f.write(block)
+
+
+def _fetch_google_drive(url: str, part_path: str) -> None:
+    """Downloads from Google Drive with gdown, which keeps and resumes its own partial file."""
+    import gdown
+    if os.path.exists(part_path):
+        os.remove(part_path)  # A complete file from an earlier run that was never verified
+    if gdown.download(url, part_path, quiet=True, resume=True) is None:
+        raise IOError(f"gdown could not download {url}")
+
+
+def _fetch(url: str, part_path: str) -> None:
+    local = _local_path(url)
+    if local is not None:
+        _fetch_local(local, part_path)
+    elif urlparse(url).netloc.endswith("drive.google.com"):
+        _fetch_google_drive(url, part_path)
+    else:
+        _fetch_http(url, part_path)
+
+
+def download_artifact(artifact: DownloadArtifact, dest_root: str,
+                      require_checksum: bool = KB_REQUIRE_CHECKSUMS) -> DownloadResult:
+    """
+    Downloads one artifact into dest_root unless a verified copy is already there.
+
+    The file is written to `<dest>.part`, checked against the manifest size and checksum, and
+    only then atomically renamed into place, so a crash never leaves a truncated file that
+    looks complete. An interrupted download resumes from the partial file on the next start.
+    An artifact without a SHA-256 is downloaded unverified, or fails if `require_checksum` is set.
+    """
+    start = time.perf_counter()
+    dest = os.path.join(dest_root, *artifact.path.split("/"))
+    try:
+        if _is_complete(dest, artifact):
+            return DownloadResult(path=artifact.path, status="present", bytes=os.path.getsize(dest))
+        if artifact.sha256 is None:
+            if require_checksum:
+                raise UnverifiedArtifactError(
+                    "no SHA-256 to verify the download against, and KB_REQUIRE_CHECKSUMS is set; "
+                    "pin one or download from a mirror"
+                )
+            print(f"WARNING: Downloading {artifact.path} without a checksum; its contents are not verified.")
+
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        part_path = dest + PART_SUFFIX
+        _fetch(artifact.url, part_path)
+        try:
+            _verify(part_path, artifact)
+        except ChecksumMismatchError:
+            # The partial file may be stale or corrupt: start over once from scratch
+            os.remove(part_path)
+            _fetch(artifact.url, part_path)
+            _verify(part_path, artifact)
+
+        os.replace(part_path, dest)
+        _mark_verified(dest, artifact)
+        return DownloadResult(path=artifact.path, status="downloaded", bytes=os.path.getsize(dest),
+                              duration_ms=(time.perf_counter() - start) * 1000)
+    except Exception as e:
+        return DownloadResult(path=artifact.path, status="failed", error=str(e),
+                              duration_ms=(time.perf_counter() - start) * 1000)
+
+
+def download_artifacts(artifacts: List[DownloadArtifact], dest_root: str, workers: int = KB_DOWNLOAD_WORKERS,
+                       require_checksum: bool = KB_REQUIRE_CHECKSUMS) -> List[DownloadResult]:
+    """
+    Downloads all artifacts concurrently into dest_root.
+
+    Args:
+        artifacts (List[DownloadArtifact]): Files to make available
+        dest_root (str): Destination directory; artifact paths are relative to it
+        workers (int): Maximum concurrent downloads
+        require_checksum (bool): Refuse artifacts that have no SHA-256
+
+    Returns:
+        List[DownloadResult]: One result per artifact, in input order. Failures are reported,
+        not raised, so the readiness checks decide whether the app can serve.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="kb-download") as pool:
+        results = list(pool.map(lambda artifact: download_artifact(artifact, dest_root, require_checksum), artifacts))
+    for result in results:
+        details = f" ({result.error})" if result.error else f" ({result.bytes} bytes, {result.duration_ms:.0f} ms)"
+        print(f"  {result.status:<10} {result.path}{details}")
+    print(f"Downloaded {sum(r.status == 'downloaded' for r in results)} of {len(results)} artifacts "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({sum(r.status == 'failed' for r in results)} failed).")
+    return results
+
+
+if __name__ == "__main__":
+    # Write a mirror manifest for a directory: python -m src.my_agents.shared.downloads src/chroma_dbs
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python -m src.my_agents.shared.downloads <mirror-directory>")
+    written = write_mirror_manifest(sys.argv[1])
+    print(f"Wrote {MIRROR_MANIFEST_FILENAME} listing {len(written['files'])} files.")
@@ -0,0 +1,258 @@
+# src/my_agents/shared/embeddings.py
+import os
+import re
+import logging
+import threading
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from .cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+# --- Embedding Model Configuration ---
+# One embedding component is shared by ingestion (create_knowledge_bases.py) and the query
+# tools: all-MiniLM-L6-v2 exported to ONNX (the same files Chroma's default embedding function
+# downloads), run with onnxruntime, so neither path needs torch.
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIMENSIONS = 384
+# sentence-transformers truncates all-MiniLM-L6-v2 input at 256 word pieces; so do we.
+EMBEDDING_MAX_TOKENS = 256
+# Use a dynamically int8-quantized copy of the model (smaller and faster on CPU, slightly
+# different embeddings, so collections must be rebuilt with the same setting).
+EMBEDDING_QUANTIZED = os.getenv("EMBEDDING_QUANTIZED", "false").lower() in ("1", "true", "yes")
+# Directory holding model.onnx and tokenizer.json; defaults to Chroma's model cache.
+EMBEDDING_MODEL_DIR = os.getenv("EMBEDDING_MODEL_DIR")
+# onnxruntime intra-op threads per model instance (0 lets onnxruntime decide).
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+# Collection metadata key recording which model produced the stored embeddings.
+EMBEDDING_MODEL_METADATA_KEY = "embedding_model"
+
+QUANTIZED_MODEL_FILENAME = "model_int8.onnx"
+
+# --- Query Embedding Cache Configuration ---
+# Most traffic is a few hundred repeated phrasings, so query embeddings are cached
+# by normalized text and shared by the product and support knowledge bases.
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+query_embedding_cache = TTLLRUCache(
+    max_size=QUERY_EMBEDDING_CACHE_SIZE,
+    ttl_seconds=QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+    name="query_embeddings"
+)
+
+
+class EmbeddingModelMismatchError(RuntimeError):
+    """Stored embeddings and query embeddings come from different models."""
+
+
+def _default_model_dir() -> str:
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+    return os.path.join(str(ONNXMiniLM_L6_V2.DOWNLOAD_PATH), ONNXMiniLM_L6_V2.EXTRACTED_FOLDER_NAME)
+
+
+def _download_model_files() -> None:
+    """Downloads the ONNX model to Chroma's cache (checksum-verified by Chroma) if it is missing."""
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+    ONNXMiniLM_L6_V2()._download_model_if_not_exists()
+
+
+def quantize_model(model_dir: str) -> str:
+    """
+    Writes a dynamically int8-quantized copy of model.onnx next to it, unless one already exists.
+    Quantizing needs the `onnx` package; the quantized file itself only needs onnxruntime, so it
+    can be produced once and shipped with EMBEDDING_MODEL_DIR.
+
+    Returns:
+        str: Path of the quantized model
+    """
+    quantized_path = os.path.join(model_dir, QUANTIZED_MODEL_FILENAME)
+    if os.path.exists(quantized_path):
+        return quantized_path
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise ImportError(
+            f"Quantizing the embedding model requires the 'onnx' package (pip install onnx), "
+            f"or place a pre-quantized {QUANTIZED_MODEL_FILENAME} in {model_dir}"
+        ) from e
+    print(f"Quantizing embedding model to int8: {quantized_path}")
+    tmp_path = f"{quantized_path}.tmp"
+    quantize_dynamic(os.path.join(model_dir, "model.onnx"), tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+class OnnxEmbeddingModel:
+    """
+    all-MiniLM-L6-v2 on onnxruntime: word-piece tokenization, transformer forward pass, mean
+    pooling over real tokens and L2 normalization, matching sentence-transformers' output.
+
+    Batches are padded to their longest text rather than to the maximum length, and texts are
+    sorted by length before batching, so short queries do not pay for 256 positions.
+
+    Args:
+        model_dir (Optional[str]): Directory with model.onnx and tokenizer.json; defaults to Chroma's cache
+        quantized (bool): Run the int8-quantized model
+        threads (int): onnxruntime intra-op threads (0 lets onnxruntime decide)
+        max_tokens (int): Word pieces kept per text
+    """
+
+    def __init__(self, model_dir: Optional[str] = None, quantized: bool = False, threads: int = 0,
+                 max_tokens: int = EMBEDDING_MAX_TOKENS):
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.threads = threads
+        self.max_tokens = max_tokens
+        self._tokenizer: Optional[Any] = None
+        self._session: Optional[Any] = None
+        self._input_names: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the embedding space; stored with each collection and checked at query time."""
+        return f"{EMBEDDING_MODEL_NAME}/onnx-{'int8' if self.quantized else 'fp32'}"
+
+    def prepare_model_files(self) -> str:
+        """
+        Makes sure the model files exist, downloading them to Chroma's cache or quantizing them
+        as configured, without loading anything. Returns the path of the ONNX model to run.
+        """
+        model_dir = self.model_dir or _default_model_dir()
+        if self.model_dir is None and not os.path.exists(os.path.join(model_dir, "model.onnx")):
+            _download_model_files()
+        return quantize_model(model_dir) if self.quantized else os.path.join(model_dir, "model.onnx")
+
+    def load(self) -> None:
+        """Loads the tokenizer and ONNX session, downloading or quantizing the model first if needed."""
+        if self._session is not None:
+            return
+        with self._lock:
+            if self._session is not None:
+                return
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            model_path = self.prepare_model_files()
+            tokenizer = Tokenizer.from_file(os.path.join(os.path.dirname(model_path), "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self.max_tokens)
+            tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+            options = ort.SessionOptions()
+            options.log_severity_level = 3
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.threads > 0:
+                options.intra_op_num_threads = self.threads
+            session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+            self._tokenizer = tokenizer
+            self._input_names = [i.name for i in session.get_inputs()]
+            self._session = session
+            logger.info("Loaded embedding model %s from %s", self.model_id, model_path)
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encoded = self._tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask,
+                  "token_type_ids": np.zeros_like(input_ids)}
+        last_hidden_state = self._session.run(None, {name: inputs[name] for name in self._input_names})[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embeds texts.
+
+        Args:
+            texts (Sequence[str]): Texts to embed
+            batch_size (int): Texts per forward pass
+
+        Returns:
+            np.ndarray: Unit-length float32 embeddings of shape (len(texts), EMBEDDING_DIMENSIONS), in input order
+        """
+        self.load()
+        texts = list(texts)
+        embeddings = np.zeros((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            positions = order[start:start + batch_size]
+            embeddings[positions] = self._encode_batch([texts[i] for i in positions])
+        return embeddings
+
+
+_embedding_model: Optional[OnnxEmbeddingModel] = None
+_embedding_model_lock = threading.Lock()
+
+
+def normalize_query(text: str) -> str:
+    """Normalizes query text for use as a cache key (case, surrounding and repeated whitespace)."""
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def get_embedding_model() -> OnnxEmbeddingModel:
+    """Returns the process-wide embedding model configured by the EMBEDDING_* settings."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                _embedding_model = OnnxEmbeddingModel(
+                    model_dir=EMBEDDING_MODEL_DIR,
+                    quantized=EMBEDDING_QUANTIZED,
+                    threads=EMBEDDING_THREADS
+                )
+    return _embedding_model
+
+
+def verify_embedding_model(collection_metadata: Optional[dict], collection_name: str,
+                           model: Optional[OnnxEmbeddingModel] = None) -> None:
+    """
+    Checks that a collection's stored embeddings were produced by the model used for queries.
+
+    Raises:
+        EmbeddingModelMismatchError: If the collection records a different model
+    """
+    model = model or get_embedding_model()
+    stored_model_id = (collection_metadata or {}).get(EMBEDDING_MODEL_METADATA_KEY)
+    if stored_model_id is None:
+        logger.warning("Collection '%s' does not record its embedding model; assuming %s. "
+                       "Re-run create_knowledge_bases.py to tag it.", collection_name, model.model_id)
+    elif stored_model_id != model.model_id:
+        raise EmbeddingModelMismatchError(
+            f"Collection '{collection_name}' was embedded with {stored_model_id}, but queries use {model.model_id}. "
+            f"Rebuild the knowledge base or set EMBEDDING_QUANTIZED to match."
+        )
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embeds texts without caching. Returns a float32 matrix of shape (len(texts), dim)."""
+    return get_embedding_model().encode(texts)
+
+
+def embed_query(query: str) -> np.ndarray:
+    """
+    Embeds a single query, serving repeated phrasings from the shared embedding cache.
+
+    Args:
+        query (str): The raw user query
+
+    Returns:
+        np.ndarray: A read-only float32 embedding vector
+    """
+    key = normalize_query(query)
+    embedding = query_embedding_cache.get(key)
+    if embedding is not None:
+        return embedding
+
+    embedding = embed_texts([key])[0]
+    embedding.setflags(write=False)  # Cached arrays are shared between callers
+    query_embedding_cache.set(key, embedding)
+    return embedding
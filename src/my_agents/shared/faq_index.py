@@ -0,0 +1,222 @@
+# src/my_agents/shared/faq_index.py
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from .embeddings import embed_query, embed_texts, normalize_query
+
+# --- FAQ Fast Path Configuration ---
+# A handful of questions (warranty, returns, pricing) make up much of the traffic. When enabled,
+# a query that matches a canonical question closely enough is answered with its stored answer,
+# without any LLM call.
+FAQ_FAST_PATH_ENABLED = os.getenv("FAQ_FAST_PATH_ENABLED", "false").lower() in ("1", "true", "yes")
+DEFAULT_FAQ_ANSWERS_FILE = os.path.join(os.path.dirname(__file__), "faq_answers.json")
+FAQ_ANSWERS_FILE = os.getenv("FAQ_ANSWERS_FILE", DEFAULT_FAQ_ANSWERS_FILE)
+# Also index the question/answer pairs found in the knowledge bases, next to the curated entries.
+FAQ_MINE_KNOWLEDGE_BASES = os.getenv("FAQ_MINE_KNOWLEDGE_BASES", "true").lower() in ("1", "true", "yes")
+# Deliberately strict: a stored answer must answer the query as asked.
+FAQ_MIN_SIMILARITY = float(os.getenv("FAQ_MIN_SIMILARITY", "0.92"))
+# Longer queries usually ask more than the canonical question does.
+FAQ_MAX_QUERY_CHARS = int(os.getenv("FAQ_MAX_QUERY_CHARS", "200"))
+# Distinct missed queries kept for the stats, to find questions worth adding to the index.
+FAQ_MISS_LOG_SIZE = int(os.getenv("FAQ_MISS_LOG_SIZE", "500"))
+
+CURATED = "curated"
+MINED = "mined"
+
+# "- **Is it noisy?** The GrowPod's pump is very quiet..." on a single line
+_QUESTION_LINE_RE = re.compile(r"^\s*-\s*\*\*(?P<question>[^*\n]+\?)\*\*\s*(?P<answer>\S.*)$", re.MULTILINE)
+# "**Query: How do I update my payment method?**" followed by the answer in the same chunk
+_QUERY_BLOCK_RE = re.compile(r"^\s*\*\*Query:\s*(?P<question>[^*\n]+?)\*\*\s*\n(?P<answer>.+)", re.DOTALL)
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+# Chunks can end mid-sentence; a mined answer is only used if it ends like a complete sentence
+_COMPLETE_ANSWER_ENDINGS = (".", "!", "?", ")", '"')
+
+
+class FaqEntry(BaseModel):
+    """A pre-approved answer and the canonical questions it answers."""
+    id: str
+    questions: List[str]
+    answer: str
+    domain: Optional[str] = None
+    source: str = CURATED
+
+
+class FaqMatch(BaseModel):
+    """A query answered from the FAQ index."""
+    entry_id: str
+    question: str
+    answer: str
+    similarity: float
+    exact: bool = False
+    latency_ms: float = 0.0
+
+
+def load_faq_entries(path: str) -> List[FaqEntry]:
+    """Loads the curated entries; a missing file just means there are none."""
+    if not os.path.exists(path):
+        print(f"WARNING: FAQ answers file not found: {path}")
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    entries = [FaqEntry(**entry) for entry in config["entries"]]
+    ids = [entry.id for entry in entries]
+    if len(ids) != len(set(ids)):
+        raise ValueError("FAQ entry ids must be unique")
+    return entries
+
+
+def mine_faq_entries(domain: str, documents: Sequence[str]) -> List[FaqEntry]:
+    """
+    Extracts question/answer pairs from knowledge base chunks: bold questions followed by their
+    answer on the same line, and "**Query: ...**" blocks followed by the answer. Answers cut off
+    by chunking are skipped.
+    """
+    entries: Dict[str, FaqEntry] = {}
+    for document in documents:
+        pairs = [(m.group("question"), m.group("answer")) for m in _QUESTION_LINE_RE.finditer(document)]
+        block = _QUERY_BLOCK_RE.match(document)
+        if block is not None:
+            pairs.append((block.group("question"), block.group("answer")))
+        for question, answer in pairs:
+            question, answer = question.strip(), answer.strip()
+            entry_id = f"{domain}:{_SLUG_RE.sub('-', question.lower()).strip('-')}"
+            if answer.endswith(_COMPLETE_ANSWER_ENDINGS) and entry_id not in entries:
+                entries[entry_id] = FaqEntry(id=entry_id, questions=[question], answer=answer, domain=domain, source=MINED)
+    return list(entries.values())
+
+
+class FaqIndex:
+    """
+    Canonical questions with pre-approved answers, matched by normalized text and then by embedding.
+
+    Curated entries come first; entries mined from the knowledge bases add the questions the
+    curated ones do not cover. The index is rebuilt when a knowledge base reload changes its data.
+
+    Args:
+        entries (Sequence[FaqEntry]): Curated entries
+        knowledge_bases (Sequence[KnowledgeBase]): Knowledge bases to mine for further entries
+        min_similarity (float): Minimum cosine similarity between a query and a canonical question
+        max_query_chars (int): Longer queries are never answered from the index
+    """
+
+    def __init__(self, entries: Sequence[FaqEntry], knowledge_bases: Sequence[Any] = (),
+                 min_similarity: float = FAQ_MIN_SIMILARITY, max_query_chars: int = FAQ_MAX_QUERY_CHARS):
+        self.curated = list(entries)
+        self.knowledge_bases = list(knowledge_bases)
+        self.min_similarity = min_similarity
+        self.max_query_chars = max_query_chars
+        self._entries: List[FaqEntry] = []
+        self._questions: List[Tuple[int, str]] = []  # (entry position, question) per embedding row
+        self._exact: Dict[str, int] = {}  # Normalized question -> row
+        self._embeddings: Optional[np.ndarray] = None
+        self._built_for: Optional[Tuple[str, ...]] = None
+        self._build_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.hit_ms = 0.0
+        self.usage: Counter = Counter()
+        self.missed_queries: Dict[str, Dict[str, Any]] = {}
+
+    def _kb_versions(self) -> Tuple[str, ...]:
+        return tuple(kb.version for kb in self.knowledge_bases)
+
+    def _build(self, kb_versions: Tuple[str, ...]) -> None:
+        entries = list(self.curated)
+        for kb in self.knowledge_bases:
+            if kb.is_initialized:
+                entries.extend(mine_faq_entries(kb.domain, [document for document, _ in kb.stored_chunks()]))
+
+        questions, exact = [], {}
+        for position, entry in enumerate(entries):
+            for question in entry.questions:
+                key = normalize_query(question)
+                if key not in exact:  # Curated entries win over mined ones asking the same question
+                    exact[key] = len(questions)
+                    questions.append((position, question))
+        embeddings = embed_texts([question for _, question in questions]) if questions else None
+
+        self._entries, self._questions, self._exact = entries, questions, exact
+        self._embeddings = embeddings
+        self._built_for = kb_versions
+        mined = sum(entry.source == MINED for entry in entries)
+        print(f"FAQ index built: {len(entries)} entries ({mined} mined), {len(questions)} questions")
+
+    def warm_up(self) -> None:
+        """Builds the index (mining the knowledge bases and embedding the questions) if it is stale."""
+        kb_versions = self._kb_versions()
+        if self._built_for != kb_versions:
+            with self._build_lock:
+                if self._built_for != kb_versions:
+                    self._build(kb_versions)
+
+    @property
+    def entries(self) -> List[FaqEntry]:
+        self.warm_up()
+        return list(self._entries)
+
+    def match(self, query: str) -> Optional[FaqMatch]:
+        """
+        Returns the stored answer for `query`, or None if no canonical question matches closely enough.
+        Blocking (it may embed the query); call it off the event loop.
+        """
+        start = time.perf_counter()
+        if len(query.strip()) > self.max_query_chars:
+            return None
+        self.warm_up()
+        key = normalize_query(query)
+        row, similarity = self._exact.get(key), 1.0
+        exact = row is not None
+        if row is None and self._embeddings is not None:
+            similarities = self._embeddings @ embed_query(query)
+            row = int(np.argmax(similarities))
+            similarity = float(similarities[row])
+
+        if row is None or similarity < self.min_similarity:
+            nearest = self._entries[self._questions[row][0]].id if row is not None else None
+            self._record_miss(key, nearest, similarity if row is not None else 0.0)
+            return None
+
+        position, question = self._questions[row]
+        entry = self._entries[position]
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self.hits += 1
+            self.hit_ms += latency_ms
+            self.usage[entry.id] += 1
+        print(f"[DEBUG] FAQ hit '{entry.id}' (similarity={similarity:.3f}, {latency_ms:.1f} ms)")
+        return FaqMatch(entry_id=entry.id, question=question, answer=entry.answer,
+                        similarity=similarity, exact=exact, latency_ms=latency_ms)
+
+    def _record_miss(self, key: str, nearest: Optional[str], similarity: float) -> None:
+        with self._stats_lock:
+            self.misses += 1
+            missed = self.missed_queries.get(key)
+            if missed is not None:
+                missed["count"] += 1
+            elif len(self.missed_queries) < FAQ_MISS_LOG_SIZE:
+                self.missed_queries[key] = {"count": 1, "nearest_entry": nearest, "similarity": round(similarity, 3)}
+
+    def stats(self, top_misses: int = 20) -> Dict[str, Any]:
+        """Hit rate, per-entry usage and the most frequent missed queries (with their nearest entry)."""
+        with self._stats_lock:
+            total = self.hits + self.misses
+            misses = sorted(self.missed_queries.items(), key=lambda item: item[1]["count"], reverse=True)
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "avg_hit_ms": round(self.hit_ms / self.hits, 2) if self.hits else 0.0,
+                "usage": dict(self.usage.most_common()),
+                "top_misses": [{"query": query, **details} for query, details in misses[:top_misses]],
+            }
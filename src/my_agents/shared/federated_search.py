@@ -0,0 +1,77 @@
+# src/my_agents/shared/federated_search.py
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from .embeddings import embed_query
+from .knowledge_base import KnowledgeBase, KnowledgeBaseQueryResult, run_in_query_pool
+
+
+class FederatedChunk(BaseModel):
+    """A retrieved chunk tagged with the knowledge base it came from."""
+    source: str
+    document: str
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    distance: Optional[float] = None
+
+
+class FederatedQueryResult(BaseModel):
+    """Merged result of querying several knowledge bases with one embedding."""
+    query: str
+    context: str
+    chunks: List[FederatedChunk] = Field(default_factory=list)
+    results: Dict[str, KnowledgeBaseQueryResult] = Field(default_factory=dict)
+    latency_ms: float = 0.0
+
+
+def _merge_chunks(results: Dict[str, KnowledgeBaseQueryResult]) -> List[FederatedChunk]:
+    """Merges per-source results by distance; keyword-only chunks (no distance) keep their rank after them."""
+    chunks = []
+    for source, result in results.items():
+        for rank, document in enumerate(result.documents):
+            metadata = result.metadatas[rank] if rank < len(result.metadatas) else {}
+            distance = result.distances[rank] if rank < len(result.distances) else None
+            chunks.append((distance is None, distance or 0.0, rank, FederatedChunk(
+                source=source,
+                document=document,
+                metadata=metadata or {},
+                distance=distance
+            )))
+    chunks.sort(key=lambda item: item[:3])
+    return [chunk for *_, chunk in chunks]
+
+
+def _format_federated_context(results: Dict[str, KnowledgeBaseQueryResult], chunks: List[FederatedChunk]) -> str:
+    if not chunks:
+        # Nothing retrieved anywhere: pass through each source's explanation.
+        return "\n\n".join(f"[{source}] {result.context}" for source, result in results.items())
+    return "\n\n".join(f"--- Context Segment ({chunk.source}) ---\n{chunk.document}" for chunk in chunks)
+
+
+async def federated_query(query: str, knowledge_bases: Sequence[KnowledgeBase]) -> FederatedQueryResult:
+    """
+    Queries several knowledge bases at once: the query is embedded a single time and every
+    collection is searched concurrently on the shared query pool.
+
+    Args:
+        query (str): The user's question
+        knowledge_bases (Sequence[KnowledgeBase]): Knowledge bases to search, e.g. product and support
+
+    Returns:
+        FederatedQueryResult: Source-tagged chunks merged by distance, plus the per-source results
+    """
+    start = time.perf_counter()
+    query_embedding = await run_in_query_pool(embed_query, query)
+    per_source = await asyncio.gather(*[kb.query(query, query_embedding=query_embedding) for kb in knowledge_bases])
+
+    results = {kb.domain: result for kb, result in zip(knowledge_bases, per_source)}
+    chunks = _merge_chunks(results)
+    return FederatedQueryResult(
+        query=query,
+        context=_format_federated_context(results, chunks),
+        chunks=chunks,
+        results=results,
+        latency_ms=(time.perf_counter() - start) * 1000
+    )
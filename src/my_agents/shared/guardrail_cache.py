@@ -0,0 +1,57 @@
+# src/my_agents/shared/guardrail_cache.py
+import hashlib
+import json
+import os
+from typing import Any, Hashable, Optional
+
+from agents import Agent, Runner
+
+from .cache import TTLLRUCache
+from .embeddings import normalize_query
+
+# --- Guardrail Verdict Cache Configuration ---
+# Popular questions reach the guardrail LLM many times an hour with the same text. Verdicts
+# are cached by normalized input and by a fingerprint of the guardrail agent's instructions
+# and model, so editing a guardrail prompt never serves verdicts produced by the old one.
+GUARDRAIL_CACHE_ENABLED = os.getenv("GUARDRAIL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+GUARDRAIL_CACHE_SIZE = int(os.getenv("GUARDRAIL_CACHE_SIZE", "4096"))
+GUARDRAIL_CACHE_TTL_SECONDS = float(os.getenv("GUARDRAIL_CACHE_TTL_SECONDS", "3600"))
+
+guardrail_verdict_cache = TTLLRUCache(
+    max_size=GUARDRAIL_CACHE_SIZE if GUARDRAIL_CACHE_ENABLED else 0,
+    ttl_seconds=GUARDRAIL_CACHE_TTL_SECONDS,
+    name="guardrail_verdicts"
+)
+
+
+def guardrail_fingerprint(agent: Agent) -> str:
+    """Short hash of everything that determines a guardrail agent's verdict besides the input."""
+    output_type = getattr(agent.output_type, "__name__", str(agent.output_type))
+    signature = "\n".join([str(agent.model), output_type, str(agent.instructions)])
+    return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+
+def verdict_cache_key(guardrail_name: str, agent: Agent, input: Any) -> Hashable:
+    """Cache key for one guardrail input: a plain message, or a full input item list."""
+    text = input if isinstance(input, str) else json.dumps(input, sort_keys=True, default=str)
+    return guardrail_name, guardrail_fingerprint(agent), normalize_query(text)
+
+
+async def run_guardrail_agent(guardrail_name: str, agent: Agent, input: Any, context: Optional[Any] = None) -> Any:
+    """
+    Returns the guardrail agent's verdict (its final output) for `input`, calling the LLM only on a cache miss.
+
+    Args:
+        guardrail_name (str): Name of the calling guardrail; verdicts are cached per guardrail
+        agent (Agent): The guardrail agent
+        input (Any): The guarded input, as passed to the guardrail function
+        context (Optional[Any]): Run context forwarded to Runner.run
+    """
+    key = verdict_cache_key(guardrail_name, agent, input)
+    verdict = guardrail_verdict_cache.get(key)
+    if verdict is not None:
+        print(f"[DEBUG] {guardrail_name}: cached verdict reused")
+        return verdict
+    result = await Runner.run(agent, input, context=context)
+    guardrail_verdict_cache.set(key, result.final_output)
+    return result.final_output
@@ -0,0 +1,219 @@
+# src/my_agents/shared/guardrail_rules.py
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+# --- Guardrail Rule Configuration ---
+# Deterministic rules checked before any guardrail LLM call. Each rule applies to the scopes
+# it lists ("universal", "product", "support", "notification") or to all of them with "*".
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(__file__), "guardrail_rules.json")
+GUARDRAIL_RULES_FILE = os.getenv("GUARDRAIL_RULES_FILE", DEFAULT_RULES_FILE)
+ALL_SCOPES = "*"
+# What a match does: "block" rejects the input outright; "escalate" leaves the decision to the
+# guardrail LLM, for patterns that also match legitimate questions.
+BLOCK = "block"
+ESCALATE = "escalate"
+ACTIONS = (BLOCK, ESCALATE)
+
+# Words are runs of letters and digits, optionally joined by apostrophes or hyphens ("don't", "next-gen").
+_WORD_RE = re.compile(r"\w+(?:['\-]\w+)*")
+
+
+class GuardrailRule(BaseModel):
+    """
+    One deterministic rule. A rule matches if any of its checks does:
+    a listed term appears as whole words, a pattern matches, or the text length is out of range.
+    """
+    id: str
+    message: str
+    action: str = BLOCK
+    scopes: List[str] = Field(default_factory=lambda: [ALL_SCOPES])
+    terms: List[str] = Field(default_factory=list)
+    # Newline-separated term list, relative to the rules file; for blocklists too long to inline.
+    terms_file: Optional[str] = None
+    # Phrases that contain a term but are acceptable, e.g. the town "Bad Homburg" for the term "bad".
+    allow: List[str] = Field(default_factory=list)
+    patterns: List[str] = Field(default_factory=list)
+    min_chars: Optional[int] = None
+    max_chars: Optional[int] = None
+
+    def applies_to(self, scope: str) -> bool:
+        return ALL_SCOPES in self.scopes or scope in self.scopes
+
+
+class RuleMatch(BaseModel):
+    """A rule that matched an input."""
+    rule_id: str
+    message: str
+    matched: str
+    action: str = BLOCK
+
+
+def _words(text: str) -> List[str]:
+    return [word.lower() for word in _WORD_RE.findall(text)]
+
+
+class _CompiledScope:
+    """
+    All rules of one scope compiled into a single matcher.
+
+    Terms and allowed phrases go into one hash table keyed by their lower-cased word sequence;
+    an input is scanned once, looking up the word n-grams that start at each word, so the cost
+    per input depends on its length and the longest term, not on how many terms there are.
+    Patterns are joined into one alternation with a named group per rule.
+    """
+
+    def __init__(self, rules: Sequence[GuardrailRule], terms: Dict[str, List[str]]):
+        self.rules = {rule.id: rule for rule in rules}
+        self.phrases: Dict[Tuple[str, ...], Tuple[Optional[str], bool]] = {}
+        for rule in rules:
+            for phrase in rule.allow:
+                self.phrases[tuple(_words(phrase))] = (None, True)
+            for term in terms[rule.id]:
+                key = tuple(_words(term))
+                if key and key not in self.phrases:
+                    self.phrases[key] = (rule.id, False)
+        self.max_words = max((len(key) for key in self.phrases), default=0)
+        self.first_words = {key[0] for key in self.phrases}
+
+        self.group_rules: Dict[str, str] = {}
+        alternatives = []
+        for rule in rules:
+            if rule.patterns:
+                group = f"r{len(self.group_rules)}"
+                self.group_rules[group] = rule.id
+                alternatives.append(f"(?P<{group}>{'|'.join(f'(?:{p})' for p in rule.patterns)})")
+        self.pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        self.length_rules = [rule for rule in rules if rule.min_chars is not None or rule.max_chars is not None]
+
+    def _term_match(self, text: str) -> Optional[RuleMatch]:
+        if not self.max_words:
+            return None
+        words = _words(text)
+        position = 0
+        while position < len(words):
+            if words[position] not in self.first_words:
+                position += 1
+                continue
+            # Longest phrase first, so an allowed phrase wins over a term it contains
+            for length in range(min(self.max_words, len(words) - position), 0, -1):
+                entry = self.phrases.get(tuple(words[position:position + length]))
+                if entry is None:
+                    continue
+                rule_id, allowed = entry
+                if not allowed:
+                    rule = self.rules[rule_id]
+                    return RuleMatch(rule_id=rule.id, message=rule.message, action=rule.action,
+                                     matched=" ".join(words[position:position + length]))
+                position += length - 1  # Skip the words of the allowed phrase
+                break
+            position += 1
+        return None
+
+    def match(self, text: str) -> Optional[RuleMatch]:
+        for rule in self.length_rules:
+            length = len(text.strip())
+            if (rule.min_chars is not None and length < rule.min_chars) or \
+                    (rule.max_chars is not None and length > rule.max_chars):
+                return RuleMatch(rule_id=rule.id, message=rule.message, action=rule.action, matched=f"{length} characters")
+        term_match = self._term_match(text)
+        if term_match is not None:
+            return term_match
+        if self.pattern is not None:
+            found = self.pattern.search(text)
+            if found is not None:
+                rule = self.rules[self.group_rules[found.lastgroup]]
+                return RuleMatch(rule_id=rule.id, message=rule.message, action=rule.action, matched=found.group(0))
+        return None
+
+
+class GuardrailRuleEngine:
+    """
+    Evaluates the deterministic guardrail rules. Rules are compiled once per scope on first use.
+
+    Args:
+        rules (Sequence[GuardrailRule]): The rules, in priority order
+        base_dir (str): Directory that `terms_file` paths are relative to
+    """
+
+    def __init__(self, rules: Sequence[GuardrailRule], base_dir: str = "."):
+        ids = [rule.id for rule in rules]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Guardrail rule ids must be unique")
+        for rule in rules:
+            if rule.action not in ACTIONS:
+                raise ValueError(f"Unknown action '{rule.action}' for guardrail rule '{rule.id}'. Expected one of {ACTIONS}.")
+            for pattern in rule.patterns:
+                re.compile(pattern)  # Fail at load time, not on the first matching input
+        self.rules = list(rules)
+        self._terms: Dict[str, List[str]] = {}
+        for rule in self.rules:
+            terms = list(rule.terms)
+            if rule.terms_file:
+                with open(os.path.join(base_dir, rule.terms_file), "r", encoding="utf-8") as f:
+                    terms.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+            self._terms[rule.id] = terms
+        self._scopes: Dict[str, List[_CompiledScope]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "GuardrailRuleEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return cls([GuardrailRule(**rule) for rule in config["rules"]], base_dir=os.path.dirname(path))
+
+    @property
+    def term_count(self) -> int:
+        return sum(len(terms) for terms in self._terms.values())
+
+    def _compiled(self, scope: str) -> List[_CompiledScope]:
+        compiled = self._scopes.get(scope)
+        if compiled is None:
+            with self._lock:
+                compiled = self._scopes.get(scope)
+                if compiled is None:
+                    # One matcher per action, blocking rules first, so an escalating match never hides a blocking one
+                    rules = [rule for rule in self.rules if rule.applies_to(scope)]
+                    compiled = [_CompiledScope([rule for rule in rules if rule.action == action], self._terms)
+                                for action in ACTIONS]
+                    self._scopes[scope] = compiled
+        return compiled
+
+    def evaluate(self, text: str, scope: str) -> Optional[RuleMatch]:
+        """
+        Returns the first rule of `scope` that matches `text`, or None if the text passes every rule.
+        Blocking rules are checked before escalating ones.
+        """
+        for compiled in self._compiled(scope):
+            match = compiled.match(text)
+            if match is not None:
+                return match
+        return None
+
+
+_rule_engine: Optional[GuardrailRuleEngine] = None
+_rule_engine_lock = threading.Lock()
+
+
+def get_rule_engine() -> GuardrailRuleEngine:
+    """Returns the process-wide rule engine loaded from GUARDRAIL_RULES_FILE."""
+    global _rule_engine
+    if _rule_engine is None:
+        with _rule_engine_lock:
+            if _rule_engine is None:
+                _rule_engine = GuardrailRuleEngine.from_file(GUARDRAIL_RULES_FILE)
+    return _rule_engine
+
+
+def check_rules(text: Optional[str], scope: str) -> Optional[RuleMatch]:
+    """Checks a guardrail input against the rules of `scope`; inputs without text are left to the LLM."""
+    if text is None:
+        return None
+    match = get_rule_engine().evaluate(text, scope)
+    if match is not None:
+        print(f"[DEBUG] Guardrail rule '{match.rule_id}' matched ({scope}, {match.action}): '{match.matched}'")
+    return match
@@ -1,5 +1,13 @@
+import asyncio
+from typing import Optional
+
 from pydantic import BaseModel
-from agents import Agent, input_guardrail, GuardrailFunctionOutput, RunContextWrapper, Runner, InputGuardrailTripwireTriggered
+from agents import Agent, input_guardrail, GuardrailFunctionOutput, InputGuardrailResult, RunContextWrapper, Runner, InputGuardrailTripwireTriggered
+
+from .guardrail_cache import run_guardrail_agent
+from .guardrail_classifier import GUARDRAIL_LOCAL_CLASSIFIER, SAFE, UNSAFE, input_text, local_guardrail
+from .knowledge_base import run_in_query_pool
+from .run_context import TurnContext
 
 class GuardrailOutput(BaseModel):
     is_question_unsafe: bool
@@ -28,25 +36,87 @@ guardrail_agent = Agent(
     tools=[]
 )
 
+async def classify_locally(input) -> Optional[GuardrailOutput]:
+    """
+    Runs the local guardrail tier. Returns its verdict for clearly safe or unsafe inputs, or
+    None when the input has to be escalated to `guardrail_agent`.
+    """
+    text = input_text(input)
+    if not GUARDRAIL_LOCAL_CLASSIFIER or text is None:
+        return None
+    verdict = await run_in_query_pool(local_guardrail.classify, text)
+    print(f"[DEBUG] Local guardrail: decision={verdict.decision}, tier={verdict.tier}, "
+          f"score={verdict.score}, latency={verdict.latency_ms:.2f} ms")
+    if verdict.decision not in (SAFE, UNSAFE):
+        return None
+    return GuardrailOutput(is_question_unsafe=verdict.decision == UNSAFE, reasoning=verdict.reasoning)
+
+async def evaluate_guardrail(input, context=None) -> GuardrailOutput:
+    """Returns the universal guardrail verdict for an input: local tier first, then the (cached) guardrail LLM."""
+    guardrail_output = await classify_locally(input)
+    if guardrail_output is None:
+        guardrail_output = await run_guardrail_agent("universal_guardrail", guardrail_agent, input, context)
+    print(f"[DEBUG] Guardrail agent response: is_question_unsafe={guardrail_output.is_question_unsafe}, reasoning='{guardrail_output.reasoning}'")
+    return guardrail_output
+
+async def _evaluate_turn(turn: TurnContext) -> GuardrailOutput:
+    if turn.guardrail_verdict is None:
+        turn.guardrail_verdict = await evaluate_guardrail(turn.user_input, turn)
+    return turn.guardrail_verdict
+
+def start_turn_check(turn: TurnContext) -> asyncio.Task:
+    """Starts checking a user turn in the background, so the answer can be computed at the same time."""
+    turn.guardrail_task = asyncio.ensure_future(_evaluate_turn(turn))
+    return turn.guardrail_task
+
+async def turn_verdict(turn: TurnContext) -> GuardrailOutput:
+    """Returns the verdict for a user turn, waiting for a check already in progress instead of starting another."""
+    if turn.guardrail_verdict is None:
+        if turn.guardrail_task is not None:
+            # Shielded: a cancelled sub-agent must not cancel the check the whole turn depends on
+            await asyncio.shield(turn.guardrail_task)
+        else:
+            await _evaluate_turn(turn)
+    return turn.guardrail_verdict
+
+async def check_turn(turn: TurnContext) -> GuardrailOutput:
+    """
+    Runs the universal guardrail once for a user turn and records the verdict in the turn
+    context, so the guarded sub-agents of the same turn skip re-checking.
+
+    Raises:
+        InputGuardrailTripwireTriggered: If the user's input is unsafe
+    """
+    await turn_verdict(turn)
+    if turn.guardrail_verdict.is_question_unsafe:
+        print("[DEBUG] Guardrail tripwire TRIGGERED by unsafe content.")
+        # The same exception the SDK raises when a guardrail trips inside a run
+        raise InputGuardrailTripwireTriggered(InputGuardrailResult(
+            guardrail=universal_guardrail,
+            output=GuardrailFunctionOutput(output_info=turn.guardrail_verdict, tripwire_triggered=True)
+        ))
+    return turn.guardrail_verdict
+
 @input_guardrail
 async def universal_guardrail( 
     ctx: RunContextWrapper[None], agent: Agent, input: str
 ) -> GuardrailFunctionOutput:
     
     print(f"\n[DEBUG] universal_guardrail entered with input: '{input}'") 
-    result = await Runner.run(guardrail_agent, input, context=ctx.context)
-
-    guardrail_output: GuardrailOutput = result.final_output
-    print(f"[DEBUG] Guardrail agent response: is_question_unsafe={guardrail_output.is_question_unsafe}, reasoning='{guardrail_output.reasoning}'")
-    
+    turn = ctx.context
+    if isinstance(turn, TurnContext) and (turn.guardrail_verdict is not None or turn.guardrail_task is not None):
+        # The user's turn is checked at the entry point; sub-agent inputs are the triage agent's
+        # rewrite of it, so that verdict is reused instead of calling the LLM again.
+        print(f"[DEBUG] universal_guardrail reusing the verdict checked for this turn ({agent.name})")
+        guardrail_output = await turn_verdict(turn)
+    else:
+        guardrail_output = await evaluate_guardrail(input, ctx.context)
     if guardrail_output.is_question_unsafe:
+        # Returning the tripped output makes the Runner raise InputGuardrailTripwireTriggered
         print("[DEBUG] Guardrail tripwire TRIGGERED by unsafe content.")
-        raise InputGuardrailTripwireTriggered(
-            f"I'm sorry, I cannot process this request. Reason: {guardrail_output.reasoning}"
-        )
-
-    print("[DEBUG] universal_guardrail finished without triggering tripwire.")
+    else:
+        print("[DEBUG] universal_guardrail finished without triggering tripwire.")
     return GuardrailFunctionOutput(
-        output_info=result.final_output, 
+        output_info=guardrail_output, 
         tripwire_triggered=guardrail_output.is_question_unsafe,
     ) 
\ No newline at end of file
@@ -0,0 +1,88 @@
+# src/my_agents/shared/hot_reload.py
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+# --- Hot Reload Configuration ---
+# Seconds between checks for newly published knowledge base data (0 disables the watcher).
+# Publish a bundle by re-exporting it, or a Chroma database by building it in a new directory
+# and switching the configured path (a symlink) to it; the app then reloads without a restart.
+KB_RELOAD_INTERVAL_SECONDS = float(os.getenv("KB_RELOAD_INTERVAL_SECONDS", "0"))
+
+
+class KnowledgeBaseReloader:
+    """
+    Reloads knowledge bases when new data is published at their configured paths.
+
+    Each reload loads and warms the new version while the current one keeps serving, then
+    swaps it in (see `KnowledgeBase.reload`). A version that failed to load is not retried
+    until something new is published, so a broken export does not cause a reload loop.
+
+    Args:
+        knowledge_bases (Sequence[KnowledgeBase]): Knowledge bases to watch
+        interval_seconds (float): Seconds between checks in the background thread
+    """
+
+    def __init__(self, knowledge_bases: Sequence[Any], interval_seconds: float = KB_RELOAD_INTERVAL_SECONDS):
+        self.knowledge_bases = list(knowledge_bases)
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._failed_versions: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+
+    def reload(self, kb: Any, force: bool = False) -> Dict[str, Any]:
+        """
+        Reloads one knowledge base if its published data differs from the version being served.
+
+        Args:
+            kb (KnowledgeBase): Knowledge base to reload
+            force (bool): Reload even if the published version looks unchanged or failed before
+
+        Returns:
+            Dict[str, Any]: Outcome with "status" ("reloaded", "unchanged", "skipped" or "failed"),
+            the served version and timings or the error
+        """
+        with self._lock:
+            if not kb.is_initialized:
+                result = {"status": "skipped", "reason": "not initialized yet"}
+            else:
+                published = kb.published_version()
+                if not force and (published == kb.version or self._failed_versions.get(kb.domain) == published):
+                    result = {"status": "unchanged", "version": kb.version}
+                else:
+                    try:
+                        timings = kb.reload()
+                        self._failed_versions.pop(kb.domain, None)
+                        result = {"status": "reloaded", "version": kb.version, "timings_ms": timings}
+                    except Exception as e:
+                        print(f"ERROR: Reload of the {kb.domain} knowledge base failed; still serving {kb.version}: {e}")
+                        self._failed_versions[kb.domain] = published
+                        result = {"status": "failed", "version": kb.version, "error": str(e)}
+            self.last_results[kb.domain] = {**result, "checked_at": time.time()}
+            return result
+
+    def reload_all(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Reloads every watched knowledge base whose published data changed."""
+        return {kb.domain: self.reload(kb, force=force) for kb in self.knowledge_bases}
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.reload_all()
+
+    def start(self) -> bool:
+        """Starts the background watcher. Returns False if it is disabled (interval <= 0)."""
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self._watch, name="kb-reload", daemon=True)
+        self._thread.start()
+        print(f"Watching knowledge bases for new data every {self.interval_seconds:g} s")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
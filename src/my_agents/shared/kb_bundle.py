@@ -0,0 +1,254 @@
+# src/my_agents/shared/kb_bundle.py
+import collections.abc
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vector_index import LOAD_PAGE_SIZE, NumpyVectorIndex
+
+# A bundle is an immutable, read-only export of one collection:
+#   manifest.json   format version, embedding model, dtype, shape and a checksum per file
+#   embeddings.npy  L2-normalized (n, dim) matrix, float32 or float16, memory-mapped at load
+#   records.jsonl   one JSON line per row: [id, document, metadata]
+#   offsets.npy     (n + 1) uint64 byte offsets of each line in records.jsonl
+#   lexical_index.json (optional) the BM25 index written at ingestion
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".bundle"
+BUNDLE_DTYPES = ("float32", "float16")
+MANIFEST_FILENAME = "manifest.json"
+EMBEDDINGS_FILENAME = "embeddings.npy"
+RECORDS_FILENAME = "records.jsonl"
+OFFSETS_FILENAME = "offsets.npy"
+BUNDLE_LEXICAL_INDEX_FILENAME = "lexical_index.json"
+
+
+class BundleIntegrityError(ValueError):
+    """A bundle file is missing, has the wrong checksum or an unsupported format."""
+
+
+def bundle_path_for(chroma_path: str) -> str:
+    """Default bundle location for a Chroma database directory, e.g. product_info_db.bundle."""
+    return os.path.normpath(chroma_path) + BUNDLE_SUFFIX
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_collection(collection: Any) -> Tuple[List[str], np.ndarray, List[str], List[Dict[str, Any]]]:
+    ids, embeddings, documents, metadatas = [], [], [], []
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=LOAD_PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"] or [{}] * len(page["ids"]))
+        offset += len(page["ids"])
+        if len(page["ids"]) < LOAD_PAGE_SIZE:
+            break
+    # Sorted by id so exporting unchanged data produces byte-identical files
+    order = sorted(range(len(ids)), key=lambda i: ids[i])
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)[order] if ids else np.zeros((0, 0), np.float32)
+    return [ids[i] for i in order], matrix, [documents[i] for i in order], [dict(metadatas[i] or {}) for i in order]
+
+
+def export_bundle(collection: Any, bundle_path: str, dtype: str = "float32", embedding_model: Optional[str] = None,
+                  lexical_index_file: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Exports a Chroma collection to a bundle directory, replacing any previous bundle there.
+
+    Args:
+        collection (chromadb.Collection): Collection to export
+        bundle_path (str): Output directory
+        dtype (str): "float32", or "float16" to halve the embedding matrix
+        embedding_model (Optional[str]): Embedding model id recorded in the manifest
+        lexical_index_file (Optional[str]): BM25 index to include, if it exists
+
+    Returns:
+        Dict[str, Any]: The manifest
+    """
+    if dtype not in BUNDLE_DTYPES:
+        raise ValueError(f"Unsupported bundle dtype '{dtype}'. Expected one of {BUNDLE_DTYPES}.")
+    ids, matrix, documents, metadatas = _read_collection(collection)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = (matrix / norms).astype(dtype)
+
+    tmp_path = f"{bundle_path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, EMBEDDINGS_FILENAME), matrix)
+    offsets = [0]
+    with open(os.path.join(tmp_path, RECORDS_FILENAME), "wb") as f:
+        for record in zip(ids, documents, metadatas):
+            line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(tmp_path, OFFSETS_FILENAME), np.asarray(offsets, dtype=np.uint64))
+    if lexical_index_file and os.path.exists(lexical_index_file):
+        shutil.copyfile(lexical_index_file, os.path.join(tmp_path, BUNDLE_LEXICAL_INDEX_FILENAME))
+
+    files = {
+        name: {"sha256": sha256_file(os.path.join(tmp_path, name)), "bytes": os.path.getsize(os.path.join(tmp_path, name))}
+        for name in sorted(os.listdir(tmp_path))
+    }
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "collection_name": getattr(collection, "name", None),
+        "embedding_model": embedding_model,
+        "dtype": dtype,
+        "count": len(ids),
+        "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "content_hash": hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest(),
+        "files": files,
+    }
+    with open(os.path.join(tmp_path, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the finished bundle into place so readers never see a half-written one
+    old_path = f"{bundle_path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(bundle_path):
+        os.replace(bundle_path, old_path)
+    os.replace(tmp_path, bundle_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(bundle_path: str) -> Dict[str, Any]:
+    manifest_file = os.path.join(bundle_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_file):
+        raise FileNotFoundError(f"Bundle manifest not found: {manifest_file}")
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise BundleIntegrityError(f"Unsupported bundle format in {bundle_path}: {manifest.get('format_version')}")
+    return manifest
+
+
+def verify_bundle(bundle_path: str, manifest: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Checks every file listed in the manifest against its size and SHA-256 checksum.
+
+    Raises:
+        BundleIntegrityError: If a file is missing or does not match
+    """
+    manifest = manifest or read_manifest(bundle_path)
+    for name, expected in manifest["files"].items():
+        path = os.path.join(bundle_path, name)
+        if not os.path.exists(path):
+            raise BundleIntegrityError(f"Bundle file missing: {path}")
+        if os.path.getsize(path) != expected["bytes"] or sha256_file(path) != expected["sha256"]:
+            raise BundleIntegrityError(f"Bundle file does not match its checksum: {path}")
+
+
+class _RecordFile:
+    """Random access to records.jsonl through a shared read-only memory map and the offsets index."""
+
+    def __init__(self, records_file: str, offsets_file: str):
+        self._offsets = np.load(offsets_file, mmap_mode="r")
+        with open(records_file, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(records_file) else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> Tuple[str, str, Dict[str, Any]]:
+        record_id, document, metadata = json.loads(self._map[int(self._offsets[i]):int(self._offsets[i + 1])])
+        return record_id, document, metadata
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+
+class _RecordField(collections.abc.Sequence):
+    """A read-only view of one field of every record, so bundle rows look like NumpyVectorIndex lists."""
+
+    def __init__(self, records: _RecordFile, field: int):
+        self._records = records
+        self._field = field
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._records[j][self._field] for j in range(*i.indices(len(self)))]
+        return self._records[i][self._field]
+
+
+class MappedVectorIndex(NumpyVectorIndex):
+    """
+    A NumpyVectorIndex served directly from a bundle: the embedding matrix is a read-only memory
+    map and records are parsed only for search hits. Nothing is copied at load time, and every
+    process that maps the same bundle shares one physical copy through the page cache.
+    """
+
+    def __init__(self, embeddings: np.ndarray, records: _RecordFile):
+        # Deliberately skips NumpyVectorIndex.__init__: bundle rows are already L2-normalized
+        # and must stay memory-mapped rather than being copied.
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(records):
+            raise BundleIntegrityError("Bundle embeddings and records do not have the same number of rows")
+        self.embeddings = embeddings
+        self._record_file = records
+        self.ids = _RecordField(records, 0)
+        self.documents = _RecordField(records, 1)
+        self.metadatas = _RecordField(records, 2)
+
+    def _records(self, indices: Sequence[int]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        return [self._record_file[int(i)] for i in indices]
+
+
+class KnowledgeBaseBundle:
+    """
+    An opened bundle.
+
+    Args:
+        path (str): Bundle directory
+        manifest (Dict[str, Any]): Parsed manifest.json
+        index (MappedVectorIndex): Memory-mapped vector index over the bundle
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any], index: MappedVectorIndex):
+        self.path = path
+        self.manifest = manifest
+        self.index = index
+
+    @property
+    def lexical_index_file(self) -> Optional[str]:
+        if BUNDLE_LEXICAL_INDEX_FILENAME not in self.manifest["files"]:
+            return None
+        return os.path.join(self.path, BUNDLE_LEXICAL_INDEX_FILENAME)
+
+    def close(self) -> None:
+        """Unmaps the records file. The embedding map is released once the index is no longer referenced."""
+        self.index._record_file.close()
+
+    @classmethod
+    def open(cls, path: str, verify: bool = True) -> "KnowledgeBaseBundle":
+        """Memory-maps a bundle, checking file checksums first unless verify is False."""
+        manifest = read_manifest(path)
+        if verify:
+            verify_bundle(path, manifest)
+        embeddings = np.load(os.path.join(path, EMBEDDINGS_FILENAME), mmap_mode="r")
+        records = _RecordFile(os.path.join(path, RECORDS_FILENAME), os.path.join(path, OFFSETS_FILENAME))
+        if embeddings.size == 0:
+            embeddings = np.zeros((0, manifest.get("dimension") or 0), dtype=np.float32)
+        return cls(path, manifest, MappedVectorIndex(embeddings, records))
@@ -0,0 +1,663 @@
+# src/my_agents/shared/knowledge_base.py
+import asyncio
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import chromadb
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .embeddings import EMBEDDING_MODEL_METADATA_KEY, embed_query, embed_texts, verify_embedding_model
+from .retrieval_cache import SemanticResultCache
+from .vector_index import LOAD_PAGE_SIZE, NumpyVectorIndex
+from .kb_bundle import KnowledgeBaseBundle, MANIFEST_FILENAME, bundle_path_for
+from .lexical_index import BM25Index, LEXICAL_INDEX_FILENAME, reciprocal_rank_fusion
+from .context_packing import pack_context, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# --- Query Execution Configuration ---
+# Chroma queries (embedding + vector search + SQLite fetch) are blocking calls.
+# They run on a small shared thread pool so the asyncio event loop used by Gradio
+# and Runner.run stays free to serve other conversations.
+KB_QUERY_WORKERS = int(os.getenv("KB_QUERY_WORKERS", "4"))
+# Candidates retrieved per query; the context packing stage decides how many reach the prompt.
+DEFAULT_N_RESULTS = int(os.getenv("KB_N_RESULTS", "5"))
+
+# --- Context Packing Configuration ---
+# Chunks farther than this cosine distance are never sent to the agent ("none" disables the filter).
+_max_distance = os.getenv("CONTEXT_MAX_DISTANCE", "0.75")
+CONTEXT_MAX_DISTANCE: Optional[float] = None if _max_distance.lower() == "none" else float(_max_distance)
+# Estimated token budget for all context segments of one tool result.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "800"))
+CONTEXT_SEGMENT_HEADER = "--- Context Segment ---"
+
+# --- Retrieval Backend Configuration ---
+# "chroma": query the persistent Chroma collection (HNSW + SQLite).
+# "numpy": load the whole collection into memory at initialization and do exact
+#          dot-product search. Much faster for the small product/support collections.
+# "bundle": exact search over a memory-mapped bundle exported by create_knowledge_bases.py
+#           (--export-bundle); no Chroma database is needed at serving time.
+KB_RETRIEVAL_BACKEND = os.getenv("KB_RETRIEVAL_BACKEND", "chroma")
+RETRIEVAL_BACKENDS = ("chroma", "numpy", "bundle")
+# Check bundle file checksums when a bundle is opened.
+KB_BUNDLE_VERIFY = os.getenv("KB_BUNDLE_VERIFY", "true").lower() in ("1", "true", "yes")
+
+# --- Retrieval Mode Configuration ---
+# "vector": embedding similarity only.
+# "hybrid": fuse embedding similarity with BM25 keyword ranking (reciprocal-rank fusion),
+#           so exact model, plan and SKU names are found on the first tool call.
+KB_RETRIEVAL_MODE = os.getenv("KB_RETRIEVAL_MODE", "vector")
+RETRIEVAL_MODES = ("vector", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "10"))
+
+# --- Retrieval Result Cache Configuration ---
+# Near-duplicate queries (cosine similarity >= threshold) reuse the formatted
+# context of an earlier query, skipping vector search and document fetches.
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RETRIEVAL_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+_query_executor: Optional[ThreadPoolExecutor] = None
+_query_executor_lock = threading.Lock()
+
+
+def _get_query_executor() -> ThreadPoolExecutor:
+    """Returns the bounded thread pool shared by every knowledge base, creating it on first use."""
+    global _query_executor
+    if _query_executor is None:
+        with _query_executor_lock:
+            if _query_executor is None:
+                _query_executor = ThreadPoolExecutor(
+                    max_workers=KB_QUERY_WORKERS,
+                    thread_name_prefix="kb-query"
+                )
+    return _query_executor
+
+
+async def run_in_query_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """Runs a blocking retrieval call (embedding, vector search) on the shared query thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_query_executor(), fn, *args)
+
+
+def _collection_space(collection: chromadb.Collection) -> str:
+    """Distance function of a collection: Chroma >= 1.0 keeps it in the configuration, older versions in metadata."""
+    configuration = getattr(collection, "configuration", None)
+    hnsw = configuration.get("hnsw") if isinstance(configuration, dict) else None
+    if hnsw and hnsw.get("space"):
+        return hnsw["space"]
+    return (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+class KnowledgeBaseQueryResult(BaseModel):
+    """Result of a single knowledge base query."""
+    query: str
+    context: str = Field(description="Formatted context returned to the agent.")
+    documents: List[str] = Field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = Field(default_factory=list)
+    distances: List[Optional[float]] = Field(default_factory=list, description="Cosine distances; None for chunks found only by keyword search.")
+    latency_ms: float = Field(default=0.0, description="Wall-clock time of the query, including time spent waiting for a worker.")
+    cache_hit: bool = False
+    cache_similarity: Optional[float] = None
+    context_tokens: int = 0
+    dropped_chunks: int = 0
+
+
+class _KnowledgeBaseVersion:
+    """
+    One loaded version of a knowledge base: its Chroma client and collection or bundle, plus
+    any in-memory indexes. Queries pin a version for their whole duration; a version replaced
+    by a reload is closed once its last in-flight query has finished.
+    """
+
+    def __init__(self, version: str, source: str, collection: Optional[chromadb.Collection] = None,
+                 client: Optional[chromadb.PersistentClient] = None, space: str = "l2",
+                 index: Optional[NumpyVectorIndex] = None, lexical_index: Optional[BM25Index] = None,
+                 bundle: Optional[KnowledgeBaseBundle] = None):
+        self.version = version
+        self.source = source
+        self.collection = collection
+        self.client = client
+        self.space = space
+        self.index = index
+        self.lexical_index = lexical_index
+        self.bundle = bundle
+        self.loaded_at = time.time()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._retired = False
+        self.closed = False
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            close = self._retired and self._in_flight == 0
+        if close:
+            self._close()
+
+    def retire(self) -> None:
+        """Marks the version as replaced; it is closed as soon as no query is using it."""
+        with self._lock:
+            self._retired = True
+            close = self._in_flight == 0
+        if close:
+            self._close()
+
+    def _close(self) -> None:
+        if self.bundle is not None:
+            self.bundle.close()
+        self.collection = self.client = self.index = self.lexical_index = self.bundle = None
+        self.closed = True
+
+
+class KnowledgeBase:
+    """
+    A Chroma-backed knowledge base shared by the product and support agents.
+
+    The loaded data is double-buffered: `reload` loads and warms a new version in the
+    background while the current one keeps serving, then swaps it in atomically. Queries
+    already running finish on the version they started with.
+
+    Args:
+        domain (str): Short domain name used in log and agent-facing messages (e.g. "product")
+        chroma_path (str): Directory of the persistent Chroma database
+        collection_name (str): Name of the collection inside the database
+        n_results (int): Number of chunks retrieved per query
+        backend (Optional[str]): Retrieval backend, "chroma", "numpy" or "bundle". Defaults to KB_RETRIEVAL_BACKEND.
+        retrieval_mode (Optional[str]): "vector" or "hybrid". Defaults to KB_RETRIEVAL_MODE.
+        bundle_path (Optional[str]): Bundle directory for the "bundle" backend; defaults to `<chroma_path>.bundle`
+    """
+
+    def __init__(self, domain: str, chroma_path: str, collection_name: str, n_results: int = DEFAULT_N_RESULTS,
+                 backend: Optional[str] = None, retrieval_mode: Optional[str] = None, bundle_path: Optional[str] = None):
+        backend = backend or KB_RETRIEVAL_BACKEND
+        if backend not in RETRIEVAL_BACKENDS:
+            raise ValueError(f"Unknown retrieval backend '{backend}'. Expected one of {RETRIEVAL_BACKENDS}.")
+        retrieval_mode = retrieval_mode or KB_RETRIEVAL_MODE
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}'. Expected one of {RETRIEVAL_MODES}.")
+
+        self.domain = domain
+        self.chroma_path = chroma_path
+        self.collection_name = collection_name
+        self.n_results = n_results
+        self.backend = backend
+        self.retrieval_mode = retrieval_mode
+        self.bundle_path = bundle_path or bundle_path_for(chroma_path)
+
+        self._active: Optional[_KnowledgeBaseVersion] = None
+        self._init_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self.reload_count = 0
+        self.last_reload_error: Optional[str] = None
+        self._stale_reload_for: Optional[str] = None
+
+        self.result_cache = SemanticResultCache(
+            max_entries=RETRIEVAL_CACHE_SIZE,
+            similarity_threshold=RETRIEVAL_CACHE_SIMILARITY_THRESHOLD,
+            name=f"{domain}_retrieval_results"
+        )
+
+        # Latency statistics
+        self._stats_lock = threading.Lock()
+        self.query_count = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.last_latency_ms: Optional[float] = None
+
+    @property
+    def db_file(self) -> str:
+        return os.path.join(self.chroma_path, "chroma.sqlite3")
+
+    @property
+    def lexical_index_file(self) -> str:
+        return os.path.join(self.chroma_path, LEXICAL_INDEX_FILENAME)
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._active is not None
+
+    @property
+    def _index(self) -> Optional[NumpyVectorIndex]:
+        """In-memory (or memory-mapped) vector index of the active version, if the backend uses one."""
+        return self._active.index if self._active is not None else None
+
+    @property
+    def version(self) -> str:
+        """Identifies the version being served; changes when a reload swaps in new data."""
+        return self._active.version if self._active is not None else "uninitialized"
+
+    def published_version(self) -> str:
+        """
+        Identifies the data currently on disk at the configured path. It differs from `version`
+        once new data has been published, e.g. a re-exported bundle or a `chroma_path` symlink
+        switched to a new database directory.
+        """
+        source = os.path.realpath(self.bundle_path if self.backend == "bundle" else self.chroma_path)
+        if self.backend == "bundle":
+            version_files = [MANIFEST_FILENAME]
+        else:
+            # Writes can sit in the SQLite write-ahead log until a checkpoint; the lexical index is rewritten with the data
+            version_files = ["chroma.sqlite3", "chroma.sqlite3-wal", LEXICAL_INDEX_FILENAME]
+        parts = [source]
+        for index, name in enumerate(version_files):
+            try:
+                stat = os.stat(os.path.join(source, name))
+            except OSError:
+                if index == 0:
+                    return "missing"
+                continue
+            parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+        return ":".join(parts)
+
+    def initialize(self) -> None:
+        """Loads the first version of the knowledge base. Safe to call repeatedly; only the first call does work."""
+        if self._active is not None:
+            return
+        with self._init_lock:
+            if self._active is not None:
+                return
+            self._active = self._load_version()
+
+    def _load_version(self) -> _KnowledgeBaseVersion:
+        """Opens the Chroma client and collection (or the bundle) at the configured paths."""
+        if self.backend == "bundle":
+            return self._load_bundle_version(self.published_version())
+        print(f"Initializing {self.domain.capitalize()} Info RAG components from: {self.chroma_path}...")
+        try:
+            # Check if database directory exists
+            if not os.path.exists(self.chroma_path):
+                print(f"ERROR: Database directory does not exist: {self.chroma_path}")
+                raise FileNotFoundError(f"Database directory not found: {self.chroma_path}")
+
+            # Check if database file exists
+            if not os.path.exists(self.db_file):
+                print(f"ERROR: Database file does not exist: {self.db_file}")
+                raise FileNotFoundError(f"Database file not found: {self.db_file}")
+
+            print(f"Database file exists: {os.path.exists(self.db_file)}")
+            print(f"Database file size: {os.path.getsize(self.db_file)} bytes")
+
+            # Initialize the ChromaDB client. Chroma shares one client per directory within a
+            # process, so the resolved path is used: a symlink switched to a new database
+            # directory then gets a fresh client instead of the one serving the old version.
+            source = os.path.realpath(self.chroma_path)
+            client = chromadb.PersistentClient(path=source)
+            print("ChromaDB client initialized successfully")
+
+            # Get or create the collection
+            collection = client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+            print(f"Collection '{self.collection_name}' retrieved/created successfully")
+            # Opening the collection writes to the database file, so its version is read afterwards
+            version = self.published_version()
+
+            # Verify collection has data
+            count = collection.count()
+            print(f"Collection contains {count} documents")
+            if count == 0:
+                print(f"WARNING: The {self.domain} info collection is empty!")
+
+            # Stored and query embeddings must come from the same model to be comparable
+            verify_embedding_model(collection.metadata, self.collection_name)
+
+            index = None
+            if self.backend == "numpy":
+                index = NumpyVectorIndex.from_collection(collection)
+                print(f"Loaded {len(index)} embeddings into the in-memory {self.domain} index")
+
+            lexical_index = None
+            if self.retrieval_mode == "hybrid":
+                lexical_index = self._load_lexical_index(
+                    os.path.join(source, LEXICAL_INDEX_FILENAME), lambda: BM25Index.from_collection(collection)
+                )
+
+            return _KnowledgeBaseVersion(
+                version, source, collection=collection, client=client, space=_collection_space(collection),
+                index=index, lexical_index=lexical_index
+            )
+        except Exception as e:
+            print(f"Error initializing {self.domain} info RAG components: {e}")
+            raise
+
+    def _load_bundle_version(self, version: str) -> _KnowledgeBaseVersion:
+        """Memory-maps the exported bundle; no Chroma client is opened."""
+        print(f"Initializing {self.domain.capitalize()} Info RAG components from bundle: {self.bundle_path}...")
+        try:
+            source = os.path.realpath(self.bundle_path)
+            bundle = KnowledgeBaseBundle.open(source, verify=KB_BUNDLE_VERIFY)
+            manifest = bundle.manifest
+            print(f"Mapped {manifest['count']} {manifest['dtype']} embeddings from bundle created {manifest['created_at']}")
+            if manifest["count"] == 0:
+                print(f"WARNING: The {self.domain} info bundle is empty!")
+
+            verify_embedding_model({EMBEDDING_MODEL_METADATA_KEY: manifest.get("embedding_model")}, self.collection_name)
+
+            lexical_index = None
+            if self.retrieval_mode == "hybrid":
+                index = bundle.index
+                lexical_index = self._load_lexical_index(
+                    bundle.lexical_index_file or "",
+                    lambda: BM25Index.build(index.ids[:], index.documents[:], index.metadatas[:])
+                )
+            return _KnowledgeBaseVersion(version, source, index=bundle.index, lexical_index=lexical_index, bundle=bundle)
+        except Exception as e:
+            print(f"Error initializing {self.domain} info RAG components: {e}")
+            raise
+
+    def _load_lexical_index(self, path: str, build: Callable[[], BM25Index]) -> BM25Index:
+        """Loads the BM25 index written at ingestion, or builds one from the stored chunks if it is missing."""
+        if path and os.path.exists(path):
+            index = BM25Index.load(path)
+            print(f"Loaded lexical index with {len(index)} chunks from {path}")
+        else:
+            print(f"WARNING: Lexical index not found at {path or self.bundle_path}; building it from the stored chunks")
+            index = build()
+        return index
+
+    def _warm_up_version(self, kb_version: _KnowledgeBaseVersion) -> None:
+        """Runs a dummy search on a version, bypassing caches, so its first real query is not cold."""
+        query = f"{self.domain} warm-up query"
+        self._search(kb_version, query, embed_texts([query])[0])
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Opens the collection and runs a dummy search so the first user query does not pay
+        for lazy loading (HNSW index, SQLite pages, in-memory indexes). Caches are bypassed.
+
+        Returns:
+            Dict[str, float]: Timings in milliseconds for each warm-up phase
+        """
+        timings = {}
+        start = time.perf_counter()
+        self.initialize()
+        timings["initialize_ms"] = (time.perf_counter() - start) * 1000
+
+        phase_start = time.perf_counter()
+        kb_version = self._acquire()
+        try:
+            self._warm_up_version(kb_version)
+        finally:
+            kb_version.release()
+        timings["dummy_query_ms"] = (time.perf_counter() - phase_start) * 1000
+
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
+        return timings
+
+    def reload(self) -> Dict[str, float]:
+        """
+        Loads and warms the data now published at the configured paths, then swaps it in.
+
+        The current version keeps serving until the swap; queries that started on it finish
+        on it, and it is released once the last of them completes. If loading fails the
+        current version stays active and the error is raised.
+
+        Returns:
+            Dict[str, float]: Timings in milliseconds for the load and warm-up phases
+        """
+        with self._init_lock:  # One load at a time; initialize() waits for a running reload
+            timings = {}
+            start = time.perf_counter()
+            try:
+                new_version = self._load_version()
+                timings["load_ms"] = (time.perf_counter() - start) * 1000
+                phase_start = time.perf_counter()
+                self._warm_up_version(new_version)
+                timings["warm_up_ms"] = (time.perf_counter() - phase_start) * 1000
+            except Exception as e:
+                self.last_reload_error = str(e)
+                raise
+
+            with self._swap_lock:
+                old_version, self._active = self._active, new_version
+            # Cached results belong to the old version; the version key already keeps them from
+            # matching, clearing just frees the memory right away.
+            self.result_cache.clear()
+            if old_version is not None:
+                old_version.retire()
+
+            self.reload_count += 1
+            self.last_reload_error = None
+            timings["total_ms"] = (time.perf_counter() - start) * 1000
+            print(f"Reloaded {self.domain} knowledge base ({new_version.version}) in {timings['total_ms']:.1f} ms; "
+                  f"previous version had {old_version.in_flight if old_version else 0} queries in flight.")
+            return timings
+
+    def _reload_published(self, published: str) -> None:
+        """
+        Reloads in the background once the data on disk no longer matches the loaded version, e.g.
+        after an in-place incremental update by create_knowledge_bases.py. Started once per published version.
+        """
+        with self._stats_lock:
+            if self._stale_reload_for == published:
+                return
+            self._stale_reload_for = published
+        print(f"The {self.domain} knowledge base changed on disk; reloading it in the background.")
+
+        def reload_quietly() -> None:
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"ERROR: Reloading the updated {self.domain} knowledge base failed: {e}")
+
+        threading.Thread(target=reload_quietly, name=f"{self.domain}-kb-reload", daemon=True).start()
+
+    def _acquire(self) -> _KnowledgeBaseVersion:
+        """Pins the active version for the duration of a query. Callers must release() it."""
+        self.initialize()
+        with self._swap_lock:
+            kb_version = self._active
+            kb_version.acquire()
+        return kb_version
+
+    def stored_chunks(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Returns the (document, metadata) pairs of every stored chunk, in storage order."""
+        kb_version = self._acquire()
+        try:
+            if kb_version.index is not None:
+                return list(zip(kb_version.index.documents, kb_version.index.metadatas))
+            documents, metadatas, offset = [], [], 0
+            while True:
+                page = kb_version.collection.get(include=["documents", "metadatas"], limit=LOAD_PAGE_SIZE, offset=offset)
+                documents.extend(page["documents"] or [""] * len(page["ids"]))
+                metadatas.extend(page["metadatas"] or [{}] * len(page["ids"]))
+                offset += len(page["ids"])
+                if len(page["ids"]) < LOAD_PAGE_SIZE:
+                    break
+            return [(document or "", metadata or {}) for document, metadata in zip(documents, metadatas)]
+        finally:
+            kb_version.release()
+
+    def section_titles(self) -> List[str]:
+        """Returns the distinct section titles of the stored chunks, in first-seen order."""
+        titles = (metadata.get("section_title") for _, metadata in self.stored_chunks())
+        return list(dict.fromkeys(title for title in titles if title))
+
+    # --- Retrieval ---
+    def _vector_search_version(self, kb_version: _KnowledgeBaseVersion, query_embedding: np.ndarray,
+                               n_results: int) -> Dict[str, Any]:
+        """Runs the blocking vector search on a version. Must not be called on the event loop."""
+        if kb_version.index is not None:
+            return kb_version.index.search(query_embedding, n_results)
+        results = kb_version.collection.query(
+            query_embeddings=[query_embedding.tolist()],
+            n_results=n_results,
+            include=['documents', 'distances', 'metadatas']
+        )
+        # Report cosine distances regardless of the collection's distance function. Embeddings are
+        # unit-length, so squared L2 distance is exactly twice the cosine distance.
+        if kb_version.space == "l2" and results.get("distances"):
+            results["distances"] = [[d / 2.0 for d in row] for row in results["distances"]]
+        return results
+
+    def _vector_search(self, query_embedding: np.ndarray, n_results: int) -> Dict[str, Any]:
+        """Runs the blocking vector search on the active version. Must not be called on the event loop."""
+        kb_version = self._acquire()
+        try:
+            return self._vector_search_version(kb_version, query_embedding, n_results)
+        finally:
+            kb_version.release()
+
+    def _hybrid_search(self, kb_version: _KnowledgeBaseVersion, query: str, query_embedding: np.ndarray) -> Dict[str, Any]:
+        """Fuses vector and BM25 rankings with reciprocal-rank fusion."""
+        vector = self._vector_search_version(kb_version, query_embedding, HYBRID_CANDIDATES)
+        records = {}
+        for record_id, document, metadata, distance in zip(
+            vector["ids"][0], vector["documents"][0], vector["metadatas"][0], vector["distances"][0]
+        ):
+            records[record_id] = (document, metadata, distance)
+
+        lexical_index = kb_version.lexical_index
+        lexical_ids = []
+        for position, _ in lexical_index.search(query, HYBRID_CANDIDATES):
+            record_id = lexical_index.ids[position]
+            lexical_ids.append(record_id)
+            if record_id not in records:
+                records[record_id] = (lexical_index.documents[position], lexical_index.metadatas[position], None)
+
+        fused = reciprocal_rank_fusion([vector["ids"][0], lexical_ids])[:self.n_results]
+        return {
+            "ids": [[record_id for record_id, _ in fused]],
+            "documents": [[records[record_id][0] for record_id, _ in fused]],
+            "metadatas": [[records[record_id][1] for record_id, _ in fused]],
+            "distances": [[records[record_id][2] for record_id, _ in fused]],
+        }
+
+    def _search(self, kb_version: _KnowledgeBaseVersion, query: str, query_embedding: np.ndarray) -> Dict[str, Any]:
+        if kb_version.lexical_index is not None:
+            return self._hybrid_search(kb_version, query, query_embedding)
+        return self._vector_search_version(kb_version, query_embedding, self.n_results)
+
+    def _format_context(self, documents: List[str]) -> str:
+        """Formats retrieved documents as context for the LLM."""
+        return "\n\n".join([f"{CONTEXT_SEGMENT_HEADER}\n{doc}" for doc in documents])
+
+    def _run_query(self, query: str, query_embedding: Optional[np.ndarray] = None) -> KnowledgeBaseQueryResult:
+        kb_version = self._acquire()  # Ensure RAG components are ready and pin the version for this query
+        try:
+            return self._run_query_on_version(kb_version, query, query_embedding)
+        finally:
+            kb_version.release()
+
+    def _run_query_on_version(self, kb_version: _KnowledgeBaseVersion, query: str,
+                              query_embedding: Optional[np.ndarray]) -> KnowledgeBaseQueryResult:
+        print(f"Tool called: query_{self.domain}_knowledge_base - Query: '{query}'")
+        try:
+            if query_embedding is None:
+                query_embedding = embed_query(query)
+            # A stat per query, so results never outlive the data on disk, even when nothing reloads it
+            version = self.published_version()
+            current = version == kb_version.version
+            if not current:
+                self._reload_published(version)
+
+            cached = self.result_cache.lookup(version, query_embedding)
+            if cached is not None:
+                cached_result, similarity = cached
+                print(f"Retrieval cache hit for '{query}' (similarity {similarity:.3f}).")
+                return cached_result.model_copy(update={
+                    "query": query,
+                    "cache_hit": True,
+                    "cache_similarity": similarity
+                })
+
+            print(f"Querying collection '{self.collection_name}'...")
+            results = self._search(kb_version, query, query_embedding)
+
+            if results and results['documents'] and results['documents'][0]:
+                documents = list(results['documents'][0])
+                metadatas = list((results.get('metadatas') or [[]])[0] or [])
+                distances = [None if d is None else float(d) for d in (results.get('distances') or [[]])[0] or []]
+                packed = pack_context(
+                    documents, metadatas, distances,
+                    max_distance=CONTEXT_MAX_DISTANCE,
+                    token_budget=CONTEXT_TOKEN_BUDGET,
+                    segment_overhead_tokens=estimate_tokens(CONTEXT_SEGMENT_HEADER) + 1
+                )
+                dropped = len(documents) - len(packed.documents)
+                print(f"Retrieved {len(documents)} document chunks for '{query}', packed {len(packed.documents)} "
+                      f"(~{packed.tokens} tokens; dropped {packed.dropped_by_distance} distant, "
+                      f"{packed.dropped_as_duplicate} duplicate, {packed.dropped_by_budget} over budget).")
+                if packed.documents:
+                    result = KnowledgeBaseQueryResult(
+                        query=query,
+                        context=self._format_context(packed.documents),
+                        documents=packed.documents,
+                        metadatas=packed.metadatas,
+                        distances=packed.distances,
+                        context_tokens=packed.tokens,
+                        dropped_chunks=dropped
+                    )
+                    # Results of a replaced or outdated version are not cached
+                    if current and kb_version is self._active:
+                        self.result_cache.store(version, query_embedding, result)
+                    return result
+
+            print(f"No relevant {self.domain} documents found.")
+            return KnowledgeBaseQueryResult(
+                query=query,
+                context=f"No specific information found in the {self.domain} knowledge base for that query. "
+                        "The agent should state this or ask for clarification."
+            )
+        except Exception as e:
+            print(f"Error querying {self.domain} knowledge base: {e}")
+            return KnowledgeBaseQueryResult(
+                query=query,
+                context=f"An error occurred while trying to retrieve {self.domain} information: {str(e)}. "
+                        "The agent should inform the user about this issue."
+            )
+
+    def _record_latency(self, latency_ms: float) -> None:
+        with self._stats_lock:
+            self.query_count += 1
+            self.total_latency_ms += latency_ms
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+            self.last_latency_ms = latency_ms
+
+    def query_sync(self, query: str, query_embedding: Optional[np.ndarray] = None) -> KnowledgeBaseQueryResult:
+        """Queries the knowledge base on the calling thread. Prefer `query` from async code."""
+        start = time.perf_counter()
+        result = self._run_query(query, query_embedding)
+        result.latency_ms = (time.perf_counter() - start) * 1000
+        self._record_latency(result.latency_ms)
+        return result
+
+    async def query(self, query: str, query_embedding: Optional[np.ndarray] = None) -> KnowledgeBaseQueryResult:
+        """
+        Queries the knowledge base without blocking the event loop.
+
+        Args:
+            query (str): The user's question
+            query_embedding (Optional[np.ndarray]): Precomputed query embedding, e.g. shared across knowledge bases
+        """
+        start = time.perf_counter()
+        result = await run_in_query_pool(self._run_query, query, query_embedding)
+        result.latency_ms = (time.perf_counter() - start) * 1000
+        self._record_latency(result.latency_ms)
+        logger.info(f"{self.domain} knowledge base query took {result.latency_ms:.1f} ms")
+        return result
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Returns aggregate query latency statistics in milliseconds."""
+        with self._stats_lock:
+            return {
+                "queries": self.query_count,
+                "avg_latency_ms": self.total_latency_ms / self.query_count if self.query_count else 0.0,
+                "max_latency_ms": self.max_latency_ms,
+                "last_latency_ms": self.last_latency_ms or 0.0,
+            }
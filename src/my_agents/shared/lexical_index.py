@@ -0,0 +1,142 @@
+# src/my_agents/shared/lexical_index.py
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# File written next to chroma.sqlite3 by create_knowledge_bases.py
+LEXICAL_INDEX_FILENAME = "lexical_index.json"
+LEXICAL_INDEX_FORMAT_VERSION = 1
+
+# Reciprocal-rank fusion constant; 60 is the value from the original RRF paper.
+RRF_K = 60
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it its me my of on or our "
+    "s so that the their this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into index terms: lowercase word tokens without stopwords, plus adjacent-word
+    bigrams so that multi-word names like "GrowPod Standard" score as a phrase.
+    """
+    words = [w for w in _TOKEN_RE.findall(text.lower()) if w not in _STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class BM25Index:
+    """
+    An inverted index with Okapi BM25 scoring over knowledge base chunks.
+
+    Args:
+        ids (List[str]): Record id of each chunk (the same ids used in the Chroma collection)
+        documents (List[str]): Chunk text
+        metadatas (List[Dict[str, Any]]): Chunk metadata
+        postings (Dict[str, List[Tuple[int, int]]]): term -> [(chunk position, term frequency), ...]
+        doc_lengths (List[int]): Number of terms in each chunk
+        k1 (float): BM25 term-frequency saturation
+        b (float): BM25 length normalization
+    """
+
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+                 postings: Dict[str, List[Tuple[int, int]]], doc_lengths: List[int],
+                 k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: Sequence[str], documents: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> "BM25Index":
+        """Builds the index from chunk ids, text and metadata."""
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in ids]
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_lengths = []
+        for position, document in enumerate(documents):
+            terms = tokenize(document)
+            doc_lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                postings[term].append((position, frequency))
+        return cls(list(ids), list(documents), [dict(m or {}) for m in metadatas], dict(postings), doc_lengths)
+
+    @classmethod
+    def from_collection(cls, collection: Any) -> "BM25Index":
+        """Builds the index from every record stored in a Chroma collection."""
+        records = collection.get(include=["documents", "metadatas"])
+        return cls.build(records["ids"], records["documents"], records["metadatas"])
+
+    def save(self, path: str) -> None:
+        """Writes the index as JSON, replacing any previous file atomically."""
+        payload = {
+            "format_version": LEXICAL_INDEX_FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format_version") != LEXICAL_INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported lexical index format in {path}: {payload.get('format_version')}")
+        postings = {term: [tuple(p) for p in entries] for term, entries in payload["postings"].items()}
+        return cls(payload["ids"], payload["documents"], payload["metadatas"], postings,
+                   payload["doc_lengths"], k1=payload["k1"], b=payload["b"])
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """Returns BM25 scores for every chunk containing at least one query term."""
+        n_docs = len(self.ids)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            entries = self.postings.get(term)
+            if not entries:
+                continue
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            for position, frequency in entries:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[position] / self.avg_doc_length
+                scores[position] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return scores
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Returns up to k (chunk position, score) pairs, best first."""
+        ranked = sorted(self.scores(query).items(), key=lambda item: item[1], reverse=True)
+        return ranked[:k]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Fuses several ranked id lists into one using reciprocal-rank fusion.
+
+    Args:
+        rankings (Sequence[Sequence[str]]): Ranked ids from each retriever, best first
+        k (int): RRF smoothing constant
+
+    Returns:
+        List[Tuple[str, float]]: (id, fused score) pairs, best first
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, record_id in enumerate(ranking):
+            fused[record_id] += 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,98 @@
+# src/my_agents/shared/readiness.py
+import time
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from .embeddings import embed_texts
+
+# Component names reported by the readiness endpoint.
+EMBEDDING_MODEL_COMPONENT = "embedding_model"
+
+
+class ReadinessState:
+    """
+    Tracks start-up components and whether all of them are warm.
+
+    A replica should only receive traffic once `is_ready` is True, i.e. every
+    registered component has finished warming up without error.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self.started_at = time.time()
+
+    def register(self, components: Sequence[str]) -> None:
+        with self._lock:
+            for name in components:
+                self._components.setdefault(name, {"status": "pending", "duration_ms": None, "error": None})
+
+    def mark_ready(self, component: str, duration_ms: float) -> None:
+        with self._lock:
+            self._components[component] = {"status": "ready", "duration_ms": round(duration_ms, 1), "error": None}
+
+    def mark_failed(self, component: str, error: str) -> None:
+        with self._lock:
+            self._components[component] = {"status": "failed", "duration_ms": None, "error": error}
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return bool(self._components) and all(c["status"] == "ready" for c in self._components.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a JSON-serializable view of the readiness state."""
+        with self._lock:
+            components = {name: dict(status) for name, status in self._components.items()}
+        return {
+            "ready": bool(components) and all(c["status"] == "ready" for c in components.values()),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "components": components,
+        }
+
+
+# Process-wide readiness state exposed by the app.
+readiness = ReadinessState()
+
+
+def warm_up_knowledge_bases(knowledge_bases: Sequence[Any], state: Optional[ReadinessState] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Loads the embedding model and warms every knowledge base, recording progress in `state`.
+
+    Args:
+        knowledge_bases (Sequence[KnowledgeBase]): Knowledge bases to warm up
+        state (Optional[ReadinessState]): Readiness state to update; defaults to the process-wide one
+
+    Returns:
+        Dict[str, Dict[str, float]]: Warm-up timings in milliseconds per component and phase
+    """
+    state = state or readiness
+    kb_components: List[str] = [f"{kb.domain}_knowledge_base" for kb in knowledge_bases]
+    state.register([EMBEDDING_MODEL_COMPONENT, *kb_components])
+    timings: Dict[str, Dict[str, float]] = {}
+
+    print("\n=== Starting Warm-up ===")
+    start = time.perf_counter()
+    try:
+        # The first call loads the ONNX model (and downloads it if it is not cached yet).
+        embed_texts(["warm-up"])
+        duration_ms = (time.perf_counter() - start) * 1000
+        timings[EMBEDDING_MODEL_COMPONENT] = {"load_ms": duration_ms}
+        state.mark_ready(EMBEDDING_MODEL_COMPONENT, duration_ms)
+    except Exception as e:
+        print(f"ERROR: Embedding model warm-up failed: {e}")
+        state.mark_failed(EMBEDDING_MODEL_COMPONENT, str(e))
+
+    for kb, component in zip(knowledge_bases, kb_components):
+        try:
+            timings[component] = kb.warm_up()
+            state.mark_ready(component, timings[component]["total_ms"])
+        except Exception as e:
+            print(f"ERROR: Warm-up of {component} failed: {e}")
+            state.mark_failed(component, str(e))
+
+    for component, phases in timings.items():
+        details = ", ".join(f"{phase}={ms:.1f}" for phase, ms in phases.items())
+        print(f"Warm-up {component}: {details} (ms)")
+    print(f"=== Warm-up Complete: ready={state.is_ready} ===\n")
+    return timings
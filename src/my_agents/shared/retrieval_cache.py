@@ -0,0 +1,133 @@
+# src/my_agents/shared/retrieval_cache.py
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+# Bucket edges for the best-match similarity histogram reported in stats().
+SIMILARITY_BUCKET_EDGES = [0.5, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 1.0]
+
+
+class SemanticResultCache:
+    """
+    Caches retrieval results for near-duplicate queries.
+
+    A lookup hits when the cosine similarity between the query embedding and a
+    previously stored query embedding is at least `similarity_threshold`. Entries
+    belong to a knowledge base version; when the version changes every entry is
+    dropped, so results never outlive the data they were retrieved from.
+
+    Args:
+        max_entries (int): Maximum number of cached results. 0 disables the cache.
+        similarity_threshold (float): Minimum cosine similarity for a hit.
+        name (str): Name reported in stats.
+    """
+
+    def __init__(self, max_entries: int, similarity_threshold: float, name: str = "retrieval_results"):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._version: Optional[Hashable] = None
+        self._embeddings: Optional[np.ndarray] = None  # (max_entries, dim) ring buffer
+        self._values: List[Any] = []
+        self._next_slot = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._similarity_histogram = [0] * (len(SIMILARITY_BUCKET_EDGES) + 1)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(embedding))
+        return embedding / norm if norm > 0 else embedding
+
+    def _reset(self, version: Hashable) -> None:
+        if self._values:
+            self.invalidations += 1
+        self._version = version
+        self._embeddings = None
+        self._values = []
+        self._next_slot = 0
+
+    def _record_similarity(self, similarity: float) -> None:
+        bucket = int(np.searchsorted(SIMILARITY_BUCKET_EDGES, similarity, side="right"))
+        self._similarity_histogram[min(bucket, len(self._similarity_histogram) - 1)] += 1
+
+    def lookup(self, version: Hashable, embedding: np.ndarray) -> Optional[Tuple[Any, float]]:
+        """
+        Returns (value, similarity) for the most similar cached query above the threshold, or None.
+
+        Args:
+            version (Hashable): Current version of the knowledge base
+            embedding (np.ndarray): Embedding of the incoming query
+        """
+        if not self.enabled:
+            return None
+        query = self._unit(embedding)
+        with self._lock:
+            if version != self._version:
+                self._reset(version)
+            if not self._values:
+                self.misses += 1
+                return None
+            similarities = self._embeddings[:len(self._values)] @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            self._record_similarity(similarity)
+            if similarity >= self.similarity_threshold:
+                self.hits += 1
+                return self._values[best], similarity
+            self.misses += 1
+            return None
+
+    def store(self, version: Hashable, embedding: np.ndarray, value: Any) -> None:
+        """Stores a result for a query embedding, overwriting the oldest entry once full."""
+        if not self.enabled:
+            return
+        query = self._unit(embedding)
+        with self._lock:
+            if version != self._version:
+                self._reset(version)
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+            slot = self._next_slot
+            self._embeddings[slot] = query
+            if slot < len(self._values):
+                self._values[slot] = value
+                self.evictions += 1
+            else:
+                self._values.append(value)
+            self._next_slot = (slot + 1) % self.max_entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit ratio, eviction counters and the best-match similarity distribution."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            labels = [f"<{SIMILARITY_BUCKET_EDGES[0]}"]
+            labels += [f"{lo}-{hi}" for lo, hi in zip(SIMILARITY_BUCKET_EDGES, SIMILARITY_BUCKET_EDGES[1:])]
+            labels += [f">={SIMILARITY_BUCKET_EDGES[-1]}"]
+            return {
+                "name": self.name,
+                "size": len(self._values),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "similarity_distribution": dict(zip(labels, self._similarity_histogram)),
+            }
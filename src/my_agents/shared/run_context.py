@@ -0,0 +1,17 @@
+# src/my_agents/shared/run_context.py
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class TurnContext(BaseModel):
+    """
+    State of one user turn, passed as the run context to the triage agent. The Agents SDK
+    forwards the context to sub-agents run as tools and to handoffs, so every agent of the
+    turn can read what the entry point already established.
+    """
+    user_input: str
+    # GuardrailOutput of universal_guardrail for user_input, set once the turn has been checked.
+    guardrail_verdict: Optional[Any] = None
+    # asyncio.Task of a check still running alongside the answer (speculative mode), if any.
+    guardrail_task: Optional[Any] = None
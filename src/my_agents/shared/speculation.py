@@ -0,0 +1,102 @@
+# src/my_agents/shared/speculation.py
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from .guardrails import check_turn, start_turn_check
+from .run_context import TurnContext
+
+# --- Speculative Guardrail Configuration ---
+# When enabled, the universal guardrail and the answer run at the same time; the answer is
+# cancelled and discarded if the guardrail trips. Tripwires are rare, so almost every turn
+# drops the guardrail latency from its critical path.
+GUARDRAIL_SPECULATIVE = os.getenv("GUARDRAIL_SPECULATIVE", "false").lower() in ("1", "true", "yes")
+
+
+class SpeculationStats:
+    """Counts speculative turns, the work discarded when the guardrail trips, and the latency hidden otherwise."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.tripped = 0
+        self.answers_cancelled = 0  # Still running when the guardrail tripped
+        self.answers_discarded = 0  # Already finished when the guardrail tripped
+        self.wasted_answer_ms = 0.0
+        self.hidden_guardrail_ms = 0.0
+
+    def record_passed(self, guardrail_ms: float, answer_ms: float) -> None:
+        with self._lock:
+            self.turns += 1
+            # Run one after the other, the turn would have taken guardrail_ms + answer_ms
+            self.hidden_guardrail_ms += min(guardrail_ms, answer_ms)
+
+    def record_tripped(self, answer_ms: float, answer_finished: bool) -> None:
+        with self._lock:
+            self.turns += 1
+            self.tripped += 1
+            self.wasted_answer_ms += answer_ms
+            if answer_finished:
+                self.answers_discarded += 1
+            else:
+                self.answers_cancelled += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            passed = self.turns - self.tripped
+            return {
+                "turns": self.turns,
+                "tripped": self.tripped,
+                "answers_cancelled": self.answers_cancelled,
+                "answers_discarded": self.answers_discarded,
+                "wasted_answer_ms": round(self.wasted_answer_ms, 1),
+                "avg_hidden_guardrail_ms": round(self.hidden_guardrail_ms / passed, 1) if passed else 0.0,
+            }
+
+
+speculation_stats = SpeculationStats()
+
+
+async def run_speculatively(turn: TurnContext, answer: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Checks a user turn with the universal guardrail while computing its answer.
+
+    Agents of the turn that are guarded by universal_guardrail wait for this check instead of
+    running their own, and tools with side effects wait for its verdict before acting.
+
+    Args:
+        turn (TurnContext): The turn, also passed as the run context of the answer
+        answer (Callable[[], Awaitable[Any]]): Starts the answer, e.g. Runner.run of the triage agent
+
+    Returns:
+        Any: The answer, once the guardrail has passed
+
+    Raises:
+        InputGuardrailTripwireTriggered: If the guardrail tripped; the answer is cancelled
+    """
+    start = time.perf_counter()
+    guardrail_task = start_turn_check(turn)
+    answer_task = asyncio.ensure_future(answer())
+    answer_done_at = []
+    answer_task.add_done_callback(lambda _: answer_done_at.append(time.perf_counter()))
+
+    try:
+        await check_turn(turn)
+    except BaseException:
+        answer_finished = answer_task.done()
+        answer_task.cancel()
+        await asyncio.gather(answer_task, return_exceptions=True)
+        guardrail_task.cancel()  # No-op unless this turn itself was cancelled mid-check
+        answer_ms = ((answer_done_at[0] if answer_done_at else time.perf_counter()) - start) * 1000
+        if turn.guardrail_verdict is not None and turn.guardrail_verdict.is_question_unsafe:
+            speculation_stats.record_tripped(answer_ms, answer_finished)
+            print(f"[DEBUG] Speculative answer {'discarded' if answer_finished else 'cancelled'} after "
+                  f"{answer_ms:.0f} ms: guardrail tripped. Stats: {speculation_stats.snapshot()}")
+        raise
+
+    guardrail_ms = (time.perf_counter() - start) * 1000
+    result = await answer_task
+    speculation_stats.record_passed(guardrail_ms, (answer_done_at[0] - start) * 1000)
+    return result
@@ -0,0 +1,124 @@
+# src/my_agents/shared/streaming.py
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Optional
+
+from agents import Agent, RunConfig, Runner
+
+from .guardrails import check_turn, start_turn_check
+from .run_context import TurnContext
+from .speculation import speculation_stats
+
+# --- Streaming Configuration ---
+# When enabled, the chat shows the answer token by token, and what the agents are doing
+# until the first token arrives, instead of a spinner for the whole agent pipeline.
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+# Progress shown while a tool runs, by tool name
+TOOL_PROGRESS = {
+    "product_agent": "Asking the Product Information Agent...",
+    "support_agent": "Asking the Support Information Agent...",
+    "product_and_support_agent": "Asking the Product and Support Information Agents...",
+    "_query_product_knowledge_base": "Searching the product knowledge base...",
+    "_query_support_knowledge_base": "Searching the support knowledge base...",
+    "_query_product_and_support_knowledge_bases": "Searching the product and support knowledge bases...",
+    "create_and_send_welcome_message": "Sending the welcome message...",
+}
+
+
+def _progress(event) -> Optional[str]:
+    """Status line for a run item event, or None for events the user does not need to see."""
+    if event.name == "tool_called":
+        tool_name = getattr(event.item.raw_item, "name", None)
+        return TOOL_PROGRESS.get(tool_name, "Working on it...")
+    if event.name == "handoff_occured":  # Sic, the SDK's event name
+        return f"Handing over to the {event.item.target_agent.name}..."
+    return None
+
+
+async def stream_answer(agent: Agent, message: str, turn: TurnContext, speculative: bool = False,
+                        workflow_name: str = "Triage Agent Test",
+                        on_result: Optional[Callable[[Any], None]] = None) -> AsyncIterator[str]:
+    """
+    Runs an agent on a user turn and yields what the chat should show after each change:
+    a progress line (in italics) until the answer starts, then the answer as generated so far.
+
+    Without `speculative`, the turn must already have passed check_turn. With it, the universal
+    guardrail runs alongside the answer and nothing is shown until it has passed, so a tripped
+    turn never displays text that has to be taken back.
+
+    Args:
+        agent (Agent): The agent to run, e.g. the triage agent
+        message (str): The user's message
+        turn (TurnContext): The turn, passed as the run context
+        speculative (bool): Check the universal guardrail while the answer is generated
+        workflow_name (str): Name of the run's trace
+        on_result (Optional[Callable[[Any], None]]): Called with the finished run, e.g. to cache its answer
+
+    Yields:
+        str: The text to display for the answer
+
+    Raises:
+        InputGuardrailTripwireTriggered: If a guardrail tripped, before or after text was shown
+    """
+    start = time.perf_counter()
+    result = Runner.run_streamed(agent, message, context=turn, run_config=RunConfig(workflow_name=workflow_name))
+    guardrail_task = None
+    guardrail_done_at, answer_done_at, answer_cancelled = [], [], []
+    if speculative:
+        guardrail_task = start_turn_check(turn)
+
+        def on_guardrail_done(task: asyncio.Task) -> None:
+            guardrail_done_at.append(time.perf_counter())
+            # Stop generating as soon as the guardrail trips; check_turn below raises the tripwire
+            if task.cancelled() or task.exception() or task.result().is_question_unsafe:
+                if not result.is_complete:
+                    answer_cancelled.append(True)
+                result.cancel()
+
+        guardrail_task.add_done_callback(on_guardrail_done)
+
+    text, status, shown = "", "", None
+    guardrail_pending = guardrail_task is not None
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and event.data.type == "response.output_text.delta":
+                text += event.data.delta
+            elif event.type == "run_item_event":
+                status = _progress(event) or status
+                if event.name == "tool_called":
+                    text = ""  # Text before a tool call is a preamble; the answer comes after the tool output
+            if guardrail_pending:
+                if not guardrail_task.done():
+                    continue  # Hold everything back until the guardrail has passed
+                await check_turn(turn)
+                guardrail_pending = False
+            display = text or (f"_{status}_" if status else "")
+            if display and display != shown:
+                shown = display
+                yield display
+        if not answer_cancelled:
+            answer_done_at.append(time.perf_counter())
+
+        if guardrail_task is not None:
+            await check_turn(turn)
+            guardrail_ms = ((guardrail_done_at[0] if guardrail_done_at else time.perf_counter()) - start) * 1000
+            speculation_stats.record_passed(guardrail_ms, (answer_done_at[0] - start) * 1000)
+        final = result.final_output
+        final = text if final is None else str(final)
+        if on_result is not None:
+            on_result(result)
+        if final and final != shown:
+            yield final
+    except BaseException:
+        if guardrail_task is not None and turn.guardrail_verdict is not None and turn.guardrail_verdict.is_question_unsafe:
+            answer_ms = ((answer_done_at[0] if answer_done_at else time.perf_counter()) - start) * 1000
+            speculation_stats.record_tripped(answer_ms, answer_finished=bool(answer_done_at))
+        raise
+    finally:
+        if not result.is_complete:
+            result.cancel()
+        if guardrail_task is not None and not guardrail_task.done():
+            guardrail_task.cancel()
+            await asyncio.gather(guardrail_task, return_exceptions=True)
@@ -0,0 +1,136 @@
+# src/my_agents/shared/vector_index.py
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Number of records fetched per page when loading a collection into memory.
+LOAD_PAGE_SIZE = 1000
+# Rows of a float16 matrix (from a bundle) converted to float32 at a time when scoring, which
+# bounds the temporary copy a query makes instead of converting the whole matrix.
+SCORE_CHUNK_ROWS = 4096
+
+
+class NumpyVectorIndex:
+    """
+    Exact in-memory vector search over a small collection.
+
+    All embeddings are held in one contiguous, L2-normalized float32 matrix, so a
+    query is a single matrix-vector product followed by a partial sort. The arrays
+    are read-only after construction, which makes searches safe to run from many
+    threads without locking.
+
+    Args:
+        embeddings (np.ndarray): Matrix of shape (n, dim)
+        documents (List[str]): Document text for each row
+        metadatas (List[Dict[str, Any]]): Metadata for each row
+        ids (List[str]): Record id for each row
+    """
+
+    def __init__(self, embeddings: np.ndarray, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]):
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            raise ValueError(f"Expected a 2-D embedding matrix, got shape {matrix.shape}")
+        if not (len(documents) == len(metadatas) == len(ids) == matrix.shape[0]):
+            raise ValueError("Embeddings, documents, metadatas and ids must have the same length")
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+        matrix.setflags(write=False)
+
+        self.embeddings = matrix
+        self.documents = list(documents)
+        self.metadatas = [dict(m or {}) for m in metadatas]
+        self.ids = list(ids)
+
+    @classmethod
+    def from_collection(cls, collection: Any) -> "NumpyVectorIndex":
+        """Loads every embedding, document and metadata record from a Chroma collection."""
+        embeddings, documents, metadatas, ids = [], [], [], []
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=LOAD_PAGE_SIZE,
+                offset=offset
+            )
+            if not page["ids"]:
+                break
+            embeddings.extend(page["embeddings"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"] or [{}] * len(page["ids"]))
+            ids.extend(page["ids"])
+            offset += len(page["ids"])
+            if len(page["ids"]) < LOAD_PAGE_SIZE:
+                break
+        if not ids:
+            return cls(np.zeros((0, 0), dtype=np.float32), [], [], [])
+        return cls(np.asarray(embeddings, dtype=np.float32), documents, metadatas, ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.shape[1]
+
+    def _records(self, indices: Sequence[int]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Returns (id, document, metadata) for each row index."""
+        return [(self.ids[i], self.documents[i], self.metadatas[i]) for i in indices]
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Returns the column indices of the k highest scores per row, best first."""
+        if k >= scores.shape[1]:
+            return np.argsort(-scores, axis=1)
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        return np.take_along_axis(candidates, order, axis=1)
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarities of normalized float32 queries with every row, shape (q, n)."""
+        if self.embeddings.dtype == np.float32:
+            return queries @ self.embeddings.T
+        # Mixed float32 @ float16 would upcast the whole (memory-mapped) matrix on every query
+        scores = np.empty((queries.shape[0], self.embeddings.shape[0]), dtype=np.float32)
+        for start in range(0, self.embeddings.shape[0], SCORE_CHUNK_ROWS):
+            chunk = np.asarray(self.embeddings[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+            scores[:, start:start + chunk.shape[0]] = queries @ chunk.T
+        return scores
+
+    def search_batch(self, query_embeddings: np.ndarray, k: int) -> Dict[str, List[List[Any]]]:
+        """
+        Finds the k nearest records for each query.
+
+        Args:
+            query_embeddings (np.ndarray): Matrix of shape (q, dim)
+            k (int): Number of results per query
+
+        Returns:
+            Dict[str, List[List[Any]]]: Results in the same shape as Chroma's `collection.query`,
+            with cosine distances (1 - cosine similarity).
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if len(self) == 0 or k <= 0:
+            for key in results:
+                results[key] = [[] for _ in range(queries.shape[0])]
+            return results
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = self._scores(queries / norms)
+
+        top = self._top_k(scores, k)
+        for row, indices in enumerate(top):
+            records = self._records(indices)
+            results["ids"].append([record_id for record_id, _, _ in records])
+            results["documents"].append([document for _, document, _ in records])
+            results["metadatas"].append([metadata for _, _, metadata in records])
+            results["distances"].append([float(1.0 - scores[row, i]) for i in indices])
+        return results
+
+    def search(self, query_embedding: np.ndarray, k: int) -> Dict[str, List[List[Any]]]:
+        """Finds the k nearest records for a single query. See `search_batch`."""
+        return self.search_batch(np.asarray(query_embedding, dtype=np.float32)[None, :], k)
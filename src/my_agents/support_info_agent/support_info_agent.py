@@ -7,13 +7,13 @@ from .support_info_agent_tools import query_support_knowledge_base_tool, Support
 from ..shared.guardrails import universal_guardrail
 
 @function_tool
-def _query_support_knowledge_base(query: str) -> str:
+async def _query_support_knowledge_base(query: str) -> str:
     """
     Queries the EcoHarvest support knowledge base to find answers about troubleshooting,
     technical support, maintenance, and general assistance. Use this tool for any factual
     question about EcoHarvest support and technical assistance.
     """
-    return query_support_knowledge_base_tool(query)
+    return await query_support_knowledge_base_tool(query)
 
 instructions = """You are the EcoHarvest Support Information Agent. Your primary role is to provide detailed and accurate information about EcoHarvest support services, troubleshooting steps, maintenance procedures, and technical assistance.
 
@@ -1,6 +1,10 @@
 from pydantic import BaseModel
 from agents import Agent, input_guardrail, GuardrailFunctionOutput, RunContextWrapper, Runner, InputGuardrailTripwireTriggered
 
+from ..shared.guardrail_cache import run_guardrail_agent
+from ..shared.guardrail_classifier import input_text
+from ..shared.guardrail_rules import BLOCK, check_rules
+
 class SupportQuestionOutput(BaseModel):
     is_question_unsafe: bool
     reasoning: str
@@ -26,18 +30,20 @@ async def question_guardrail(
 ) -> GuardrailFunctionOutput:
     
     print(f"\n[DEBUG] question_guardrail entered with input: '{input}'") 
-    result = await Runner.run(guardrail_agent, input, context=ctx.context)
-
-    guardrail_output: SupportQuestionOutput = result.final_output
+    rule_match = check_rules(input_text(input), "support")
+    if rule_match is not None and rule_match.action == BLOCK:
+        guardrail_output = SupportQuestionOutput(is_question_unsafe=True, reasoning=rule_match.message)
+    else:
+        guardrail_output = await run_guardrail_agent("support_question_guardrail", guardrail_agent, input, ctx.context)
     print(f"[DEBUG] Guardrail agent response: is_question_unsafe={guardrail_output.is_question_unsafe}, reasoning='{guardrail_output.reasoning}'")
     
-    print('type(result.final_output):', type(result.final_output))
+    print('type(guardrail_output):', type(guardrail_output))
     if guardrail_output.is_question_unsafe:
         print("[DEBUG] Guardrail tripwire TRIGGERED by unsafe content.")
 
 
     print("[DEBUG] question_guardrail finished without triggering tripwire.")
     return GuardrailFunctionOutput(
-        output_info=result.final_output, 
-        tripwire_triggered=result.final_output.is_question_unsafe,
+        output_info=guardrail_output, 
+        tripwire_triggered=guardrail_output.is_question_unsafe,
     ) 
\ No newline at end of file
@@ -0,0 +1,170 @@
+# src/my_agents/triage_agent/intent_router.py
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from ..shared.embeddings import embed_query, embed_texts
+
+# --- Local Router Configuration ---
+# When enabled, product and support questions that clearly belong to one agent are dispatched
+# to it directly, skipping the triage LLM call; everything else still goes through the triage agent.
+LOCAL_ROUTER_ENABLED = os.getenv("LOCAL_ROUTER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Minimum cosine similarity to the winning route's centroid.
+LOCAL_ROUTER_MIN_SIMILARITY = float(os.getenv("LOCAL_ROUTER_MIN_SIMILARITY", "0.45"))
+# Minimum lead of the winning route's similarity over the runner-up.
+LOCAL_ROUTER_MIN_MARGIN = float(os.getenv("LOCAL_ROUTER_MIN_MARGIN", "0.08"))
+
+PRODUCT_ROUTE = "product"
+SUPPORT_ROUTE = "support"
+NOTIFICATION_ROUTE = "notification"
+# Messages closest to this pseudo-route go to the triage agent, which declines off-topic requests.
+OTHER_ROUTE = "other"
+# Routes recognised but always left to the triage agent. Welcome requests need it to extract the
+# name: the notification agent's guardrail checks its whole input as the name to welcome.
+TRIAGE_ROUTES = (NOTIFICATION_ROUTE, OTHER_ROUTE)
+
+ROUTE_EXAMPLES: Dict[str, List[str]] = {
+    PRODUCT_ROUTE: [
+        "What is the warranty period for the EcoHarvest GrowPod?",
+        "Can I grow multiple types of plants in one GrowPod?",
+        "How much does the GrowPod Standard cost?",
+        "What is the difference between the GrowPod Standard and Pro?",
+        "Which seed pod varieties do you offer?",
+        "Is the EcoHarvest App available on Android?",
+        "How much does the premium app subscription cost?",
+        "What is your return policy?",
+        "Do you offer discounts for bulk orders?",
+        "Does the GrowPod work with 2.4GHz Wi-Fi?",
+        "Are the seed pods biodegradable?",
+        "What features does the app have?",
+    ],
+    SUPPORT_ROUTE: [
+        "How do I troubleshoot if my GrowPod's pump is making unusual noise?",
+        "My plants have yellow leaves, what should I do?",
+        "What maintenance procedures are required for the GrowPod?",
+        "The grow light is not turning on.",
+        "My GrowPod won't connect to Wi-Fi.",
+        "How do I clean the water tank?",
+        "The app is not showing sensor readings.",
+        "How do I reset my GrowPod to factory settings?",
+        "My seeds are not germinating.",
+        "How do I cancel my seed pod subscription?",
+        "How do I update the GrowPod firmware?",
+        "How can I contact customer support?",
+    ],
+    NOTIFICATION_ROUTE: [
+        "Send a welcome message to Anna.",
+        "Please welcome our new user John Smith.",
+        "Create a welcome notification for Maria.",
+        "Can you send a welcome email to Peter?",
+        "Welcome message for Li Wei please.",
+    ],
+    OTHER_ROUTE: [
+        "What's the weather like today?",
+        "Who won the football match yesterday?",
+        "Tell me a joke.",
+        "Write a poem about the sea.",
+        "What is the capital of France?",
+        "Can you help me with my homework?",
+        "What do you think about politics?",
+    ],
+}
+
+
+class RoutingDecision(BaseModel):
+    """Route chosen by the local router, or None when the message should go to the triage agent."""
+    route: Optional[str] = None
+    best_route: str
+    similarity: float
+    margin: float
+    scores: Dict[str, float] = Field(default_factory=dict)
+    latency_ms: float = 0.0
+
+
+class IntentRouter:
+    """
+    Nearest-centroid intent router over query embeddings.
+
+    Each route's centroid is the mean embedding of its example queries and, for the knowledge
+    base routes, the section titles of that knowledge base. A message is dispatched to the
+    route with the most similar centroid only if that similarity and its lead over the
+    runner-up are both above the configured thresholds.
+
+    Args:
+        examples (Optional[Dict[str, List[str]]]): Example queries per route; defaults to ROUTE_EXAMPLES
+        section_titles (Optional[Dict[str, Callable[[], Sequence[str]]]]): Per route, a callable
+            returning extra anchor texts, e.g. a knowledge base's section titles
+        min_similarity (float): Minimum similarity to the winning centroid
+        min_margin (float): Minimum lead over the runner-up route
+    """
+
+    def __init__(self, examples: Optional[Dict[str, List[str]]] = None,
+                 section_titles: Optional[Dict[str, Callable[[], Sequence[str]]]] = None,
+                 min_similarity: float = LOCAL_ROUTER_MIN_SIMILARITY, min_margin: float = LOCAL_ROUTER_MIN_MARGIN):
+        self.examples = examples or ROUTE_EXAMPLES
+        self.section_titles = section_titles or {}
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._routes: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.fallbacks = 0
+
+    def _build(self) -> None:
+        routes, centroids = [], []
+        for route, examples in self.examples.items():
+            texts = list(examples)
+            if route in self.section_titles:
+                try:
+                    texts.extend(title.lower() for title in self.section_titles[route]())
+                except Exception as e:
+                    print(f"WARNING: Section titles for the {route} route are unavailable: {e}")
+            centroid = embed_texts(texts).mean(axis=0)
+            routes.append(route)
+            centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+        self._routes = routes
+        self._centroids = np.asarray(centroids, dtype=np.float32)
+
+    def warm_up(self) -> None:
+        """Embeds the examples and section titles so the first routed message does not pay for it."""
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self._build()
+
+    def route(self, message: str) -> RoutingDecision:
+        """Chooses a route for a message. Blocking (it embeds the message); call it off the event loop."""
+        start = time.perf_counter()
+        self.warm_up()
+        similarities = self._centroids @ embed_query(message)
+        order = np.argsort(similarities)[::-1]
+        best, runner_up = int(order[0]), int(order[1]) if len(order) > 1 else None
+        similarity = float(similarities[best])
+        margin = similarity - float(similarities[runner_up]) if runner_up is not None else similarity
+        best_route = self._routes[best]
+        confident = similarity >= self.min_similarity and margin >= self.min_margin and best_route not in TRIAGE_ROUTES
+
+        with self._lock:
+            if confident:
+                self.routed += 1
+            else:
+                self.fallbacks += 1
+        return RoutingDecision(
+            route=best_route if confident else None,
+            best_route=best_route,
+            similarity=similarity,
+            margin=margin,
+            scores={route: float(score) for route, score in zip(self._routes, similarities)},
+            latency_ms=(time.perf_counter() - start) * 1000
+        )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.routed + self.fallbacks
+            return {"routed": self.routed, "fallbacks": self.fallbacks,
+                    "routed_ratio": self.routed / total if total else 0.0}
@@ -1,8 +1,27 @@
+import os
+import asyncio
+from typing import Any
 from pydantic import BaseModel, Field
-from agents import Agent
-from ..product_info_agent.product_info_agent import productInfoAgent 
-from ..support_info_agent.support_info_agent import supportInfoAgent
+from agents import Agent, Runner, RunContextWrapper, function_tool
+from ..product_info_agent.product_info_agent import productInfoAgent, _query_product_knowledge_base
+from ..product_info_agent.product_info_agent_tools import product_knowledge_base
+from ..support_info_agent.support_info_agent import supportInfoAgent, _query_support_knowledge_base
+from ..support_info_agent.support_info_agent_tools import support_knowledge_base
 from ..notification_agent import notification_agent
+from ..shared.federated_search import federated_query
+from ..shared.guardrails import universal_guardrail
+from .intent_router import IntentRouter, PRODUCT_ROUTE, RoutingDecision, SUPPORT_ROUTE
+
+# When enabled, questions that span products and support are answered by running
+# both sub-agents concurrently instead of one after the other.
+TRIAGE_PARALLEL_SUBAGENTS = os.getenv("TRIAGE_PARALLEL_SUBAGENTS", "false").lower() in ("1", "true", "yes")
+# "nested": triage delegates to the product and support agents, which query their knowledge base.
+# "flat": triage queries both knowledge bases itself, saving the sub-agents' LLM calls.
+NESTED_TOPOLOGY = "nested"
+FLAT_TOPOLOGY = "flat"
+TRIAGE_TOPOLOGY = os.getenv("TRIAGE_TOPOLOGY", NESTED_TOPOLOGY).lower()
+if TRIAGE_TOPOLOGY not in (NESTED_TOPOLOGY, FLAT_TOPOLOGY):
+    raise ValueError(f"TRIAGE_TOPOLOGY must be '{NESTED_TOPOLOGY}' or '{FLAT_TOPOLOGY}', got '{TRIAGE_TOPOLOGY}'")
 
 class TriageOutput(BaseModel):
     agent_name: str = Field(
@@ -22,6 +41,32 @@ product_agent_tool = productInfoAgent.as_tool(tool_name="product_agent", tool_de
 support_agent_tool = supportInfoAgent.as_tool(tool_name="support_agent", tool_description='''
                             Handles all inquiries related to EcoHarvest support services, troubleshooting, maintenance, and technical assistance.''')
 
+@function_tool
+async def product_and_support_agent(ctx: RunContextWrapper[Any], input: str) -> str:
+    """
+    Handles inquiries that need both EcoHarvest product information and support/troubleshooting
+    information, such as whether a faulty device is covered by the warranty.
+    The Product Information Agent and Support Information Agent answer concurrently.
+    """
+    product_result, support_result = await asyncio.gather(
+        Runner.run(productInfoAgent, input, context=ctx.context),
+        Runner.run(supportInfoAgent, input, context=ctx.context)
+    )
+    return (
+        f"Product Information Agent:\n{product_result.final_output}\n\n"
+        f"Support Information Agent:\n{support_result.final_output}"
+    )
+
+@function_tool
+async def _query_product_and_support_knowledge_bases(query: str) -> str:
+    """
+    Queries the EcoHarvest product and support knowledge bases at once, for questions that need
+    both, such as whether a faulty device is covered by the warranty. Returns the relevant
+    context from both, tagged with its source.
+    """
+    result = await federated_query(query, [product_knowledge_base, support_knowledge_base])
+    return result.context
+
 triage_agent_instruction = """You are the central Triage Agent for EcoHarvest customer inquiries. Your job is to analyze requests and delegate them to the appropriate specialized agent. If a user's query is not related to EcoHarvest products, support, or notifications, you must state that you can only answer questions about EcoHarvest.
 
 Here are the specialized agents you can delegate to:
@@ -38,9 +83,61 @@ If the query is not related to any of the above, respond with: "I can only answe
 Do not just explain what you would do - actually use the appropriate tool or handoff to handle the user's request.
 """                       
 
-triage_agent = Agent(
+parallel_subagents_instruction = """
+- For questions that need BOTH product and support information (for example, whether a faulty device is covered by the warranty), use the 'product_and_support_agent' tool once instead of calling 'product_agent' and 'support_agent' separately.
+"""
+
+triage_tools = [product_agent_tool, support_agent_tool]
+if TRIAGE_PARALLEL_SUBAGENTS:
+    triage_agent_instruction += parallel_subagents_instruction
+    triage_tools.append(product_and_support_agent)
+
+nested_triage_agent = Agent(
         name="Triage Agent",
         instructions=triage_agent_instruction,
-        tools=[product_agent_tool, support_agent_tool],
+        tools=triage_tools,
+        model="gpt-4o-mini",
+        handoffs=[notification_agent])
+
+# The product and support agents' instructions, merged into one agent that answers from both knowledge bases
+flat_triage_agent_instruction = """You are the EcoHarvest customer assistant. You answer questions about EcoHarvest products and support yourself, using the knowledge base tools, and delegate welcome messages. If a user's query is not related to EcoHarvest products, support, or notifications, you must state that you can only answer questions about EcoHarvest.
+
+Here is how to handle each kind of request:
+- **Product questions**: Use the `_query_product_knowledge_base` tool for GrowPod models, app features, seed pod varieties, pricing, compatibility, warranty, returns, and general sales inquiries.
+- **Support questions**: Use the `_query_support_knowledge_base` tool for troubleshooting, technical support, maintenance procedures, billing/subscription issues, and general assistance.
+- **Questions that need both** (for example, whether a faulty device is covered by the warranty): use the `_query_product_and_support_knowledge_bases` tool, which searches both knowledge bases with one query.
+- **Welcome messages**: Use the 'Email Manager' handoff to send welcome messages to new users.
+
+**Always use the knowledge base tools for any factual question about our products, policies or support services.** Never invent information.
+If the tools return no relevant information, state that you cannot find the answer and suggest the user rephrase their question.
+Be helpful and engaging, aiming to fully answer the user's question.
+
+If the query is not related to any of the above, respond with: "I can only answer questions about EcoHarvest products, support, and services."
+Do not just explain what you would do - actually use the appropriate tool or handoff to handle the user's request.
+"""
+
+flat_triage_agent = Agent(
+        name="Triage Agent",
+        instructions=flat_triage_agent_instruction,
+        tools=[_query_product_knowledge_base, _query_support_knowledge_base, _query_product_and_support_knowledge_bases],
         model="gpt-4o-mini",
-        handoffs=[notification_agent]) 
\ No newline at end of file
+        handoffs=[notification_agent],
+        # Nested, the sub-agents run this guardrail; flat, there are no sub-agents to run it
+        input_guardrails=[universal_guardrail])
+
+triage_agent = flat_triage_agent if TRIAGE_TOPOLOGY == FLAT_TOPOLOGY else nested_triage_agent
+
+# Local router for confident cases: the chosen agent answers directly, without the triage LLM call.
+intent_router = IntentRouter(section_titles={
+    PRODUCT_ROUTE: product_knowledge_base.section_titles,
+    SUPPORT_ROUTE: support_knowledge_base.section_titles,
+})
+
+routed_agents = {
+    PRODUCT_ROUTE: productInfoAgent,
+    SUPPORT_ROUTE: supportInfoAgent,
+}
+
+def select_agent(decision: RoutingDecision) -> Agent:
+    """Returns the agent the local router chose, or the triage agent when it was not confident."""
+    return routed_agents.get(decision.route, triage_agent)
@@ -0,0 +1,57 @@
+# Micro-benchmark: guardrail rule engine vs. a substring scan and a regex alternation,
+# for growing blocklists. The engine's cost per input should stay flat as terms are added.
+#
+# Run from the repository root:
+#   python -m src.testing.benchmark_guardrail_rules
+import random
+import re
+import string
+import time
+
+from src.my_agents.shared.guardrail_rules import GuardrailRule, GuardrailRuleEngine
+
+TERM_COUNTS = (10, 100, 1_000, 10_000, 50_000)
+REPEATS = 200
+INPUTS = [
+    "What is the warranty period for the EcoHarvest GrowPod?",
+    "How do I troubleshoot if my GrowPod's pump is making unusual noise?",
+    "My plants have yellow leaves, what should I do? They have been like this since last week and "
+    "I already changed the water, cleaned the tank and moved the pod closer to the window.",
+    "Please send a welcome message to Anna from Bad Homburg.",
+    "Hi!",
+]
+
+
+def _synthetic_terms(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < count:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))) for _ in range(rng.randint(1, 3))]
+        terms.add(" ".join(words))
+    return sorted(terms)
+
+
+def _per_input_us(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        for text in INPUTS:
+            fn(text)
+    return (time.perf_counter() - start) * 1e6 / (REPEATS * len(INPUTS))
+
+
+def main() -> None:
+    print(f"{'terms':>8} {'rule engine':>14} {'substring scan':>16} {'regex alternation':>19}   (us per input)")
+    for count in TERM_COUNTS:
+        terms = _synthetic_terms(count)
+        engine = GuardrailRuleEngine([GuardrailRule(id="blocklist", message="blocked", terms=terms)])
+        engine.evaluate("warm-up", "notification")  # Compiles the scope
+
+        alternation = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE)
+        engine_us = _per_input_us(lambda text: engine.evaluate(text, "notification"))
+        substring_us = _per_input_us(lambda text: any(term in text.lower() for term in terms))
+        regex_us = _per_input_us(alternation.search)
+        print(f"{count:>8} {engine_us:>14.2f} {substring_us:>16.2f} {regex_us:>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
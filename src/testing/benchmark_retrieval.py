@@ -0,0 +1,84 @@
+# Benchmark: Chroma (HNSW + SQLite) vs. in-memory NumPy exact search.
+#
+# Run from the repository root after the knowledge bases have been downloaded:
+#   python -m src.testing.benchmark_retrieval
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from src.my_agents.shared.embeddings import embed_texts
+from src.my_agents.shared.knowledge_base import KnowledgeBase
+from src.my_agents.product_info_agent.product_info_agent_tools import PRODUCT_CHROMA_PATH, PRODUCT_COLLECTION_NAME
+from src.my_agents.support_info_agent.support_info_agent_tools import SUPPORT_CHROMA_PATH, SUPPORT_COLLECTION_NAME
+
+QUERIES = [
+    "What is the warranty period for the EcoHarvest GrowPod?",
+    "Can I grow multiple types of plants in one GrowPod?",
+    "How do I troubleshoot if my GrowPod's pump is making unusual noise?",
+    "What maintenance procedures are required for the GrowPod?",
+    "How do I connect my GrowPod to the mobile app?",
+    "How much does the premium app subscription cost?",
+    "My plants have yellow leaves, what should I do?",
+    "How do I cancel my seed pod subscription?",
+]
+REPEATS = 50
+THREADS = 8
+
+
+def _time_per_query(fn, embeddings, repeats: int = REPEATS) -> list:
+    timings = []
+    for _ in range(repeats):
+        for embedding in embeddings:
+            start = time.perf_counter()
+            fn(embedding)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {label:<28} mean {statistics.mean(timings):8.3f} ms   p50 {statistics.median(timings):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def benchmark_domain(domain: str, chroma_path: str, collection_name: str) -> None:
+    print(f"\n=== {domain} knowledge base ===")
+    chroma_kb = KnowledgeBase(domain, chroma_path, collection_name, backend="chroma")
+    numpy_kb = KnowledgeBase(domain, chroma_path, collection_name, backend="numpy")
+    chroma_kb.initialize()
+    numpy_kb.initialize()
+
+    embeddings = embed_texts(QUERIES)
+
+    # Sanity check: both backends should agree on the best match.
+    agreement = sum(
+        chroma_kb._vector_search(e, 1)["documents"][0] == numpy_kb._vector_search(e, 1)["documents"][0] for e in embeddings
+    )
+    print(f"  Top-1 agreement: {agreement}/{len(QUERIES)}")
+
+    chroma_timings = _time_per_query(lambda e: chroma_kb._vector_search(e, chroma_kb.n_results), embeddings)
+    numpy_timings = _time_per_query(lambda e: numpy_kb._vector_search(e, numpy_kb.n_results), embeddings)
+    _report("chroma (single query)", chroma_timings)
+    _report("numpy (single query)", numpy_timings)
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        numpy_kb._index.search_batch(embeddings, numpy_kb.n_results)
+    batch_ms = (time.perf_counter() - start) * 1000 / (REPEATS * len(QUERIES))
+    print(f"  {'numpy (batched, per query)':<28} mean {batch_ms:8.3f} ms")
+
+    for label, kb in (("chroma", chroma_kb), ("numpy", numpy_kb)):
+        work = [e for _ in range(REPEATS) for e in embeddings]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            list(pool.map(lambda e: kb._vector_search(e, kb.n_results), work))
+        elapsed = time.perf_counter() - start
+        print(f"  {label + f' ({THREADS} threads)':<28} {len(work) / elapsed:10.0f} queries/s")
+
+    speedup = statistics.mean(chroma_timings) / statistics.mean(numpy_timings)
+    print(f"  NumPy speedup (single query): {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark_domain("product", PRODUCT_CHROMA_PATH, PRODUCT_COLLECTION_NAME)
+    benchmark_domain("support", SUPPORT_CHROMA_PATH, SUPPORT_COLLECTION_NAME)
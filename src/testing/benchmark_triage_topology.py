@@ -0,0 +1,112 @@
+# Benchmark: nested triage (triage LLM -> sub-agent LLM -> knowledge base) vs. flat triage
+# (triage LLM -> knowledge base). Counts the LLM calls, tokens and tool calls of each answer
+# from the run's trace, and measures the end-to-end latency.
+#
+# Needs OPENAI_API_KEY and the downloaded knowledge bases. Run from the repository root:
+#   python -m src.testing.benchmark_triage_topology [--repeats N]
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from agents import Runner, trace
+from agents.tracing import TracingProcessor, add_trace_processor
+
+from src.my_agents.shared.guardrails import check_turn
+from src.my_agents.shared.run_context import TurnContext
+from src.my_agents.triage_agent.triage_agent import flat_triage_agent, nested_triage_agent
+
+QUERIES = [
+    "What is the warranty period for the EcoHarvest GrowPod?",
+    "Can I grow multiple types of plants in one GrowPod?",
+    "How much does the premium app subscription cost?",
+    "How do I troubleshoot if my GrowPod's pump is making unusual noise?",
+    "My plants have yellow leaves, what should I do?",
+    "How do I cancel my seed pod subscription?",
+    "My GrowPod's pump stopped working after two months. Is that covered by the warranty, and what can I try first?",
+    "What's the weather like today?",
+]
+TOPOLOGIES = {"nested": nested_triage_agent, "flat": flat_triage_agent}
+
+
+class _UsageCollector(TracingProcessor):
+    """Sums the model calls, tokens and tool calls of every span, per trace (sub-agent runs included)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.traces = defaultdict(lambda: {"llm_calls": 0, "input_tokens": 0, "output_tokens": 0, "tool_calls": 0})
+
+    def on_span_end(self, span) -> None:
+        data = span.span_data
+        with self._lock:
+            totals = self.traces[span.trace_id]
+            if data.type == "response":
+                totals["llm_calls"] += 1
+                usage = data.response.usage if data.response is not None else None
+                if usage is not None:
+                    totals["input_tokens"] += usage.input_tokens
+                    totals["output_tokens"] += usage.output_tokens
+            elif data.type == "function":
+                totals["tool_calls"] += 1
+
+    def on_trace_start(self, trace) -> None:
+        pass
+
+    def on_trace_end(self, trace) -> None:
+        pass
+
+    def on_span_start(self, span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+
+async def _run(collector: _UsageCollector, topology: str, query: str) -> dict:
+    # The turn guardrail is the same for both topologies; check it outside the measured run
+    turn = TurnContext(user_input=query)
+    await check_turn(turn)
+    start = time.perf_counter()
+    with trace(f"Triage topology benchmark ({topology})") as run_trace:
+        result = await Runner.run(TOPOLOGIES[topology], query, context=turn)
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {"latency_ms": latency_ms, "answer": result.final_output, **collector.traces[run_trace.trace_id]}
+
+
+def _report(topology: str, runs: list) -> None:
+    latencies = sorted(run["latency_ms"] for run in runs)
+    print(f"  {topology:<8} p50 {statistics.median(latencies):8.0f} ms   mean {statistics.mean(latencies):8.0f} ms   "
+          f"LLM calls {statistics.mean(run['llm_calls'] for run in runs):4.1f}   "
+          f"tool calls {statistics.mean(run['tool_calls'] for run in runs):4.1f}   "
+          f"input tokens {statistics.mean(run['input_tokens'] for run in runs):7.0f}   "
+          f"output tokens {statistics.mean(run['output_tokens'] for run in runs):5.0f}")
+
+
+async def main(repeats: int) -> None:
+    collector = _UsageCollector()
+    add_trace_processor(collector)
+    runs = defaultdict(list)
+    for query in QUERIES:
+        print(f"\n{query}")
+        for _ in range(repeats):
+            # Alternate the topologies so both see the same API conditions
+            for topology in TOPOLOGIES:
+                run = await _run(collector, topology, query)
+                runs[topology].append(run)
+                print(f"  {topology:<8} {run['latency_ms']:8.0f} ms   LLM calls {run['llm_calls']}   "
+                      f"tokens {run['input_tokens']}+{run['output_tokens']}")
+
+    print(f"\n=== {len(QUERIES)} queries x {repeats} ===")
+    for topology in TOPOLOGIES:
+        _report(topology, runs[topology])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the nested and flat triage topologies.")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per query and topology")
+    asyncio.run(main(parser.parse_args().repeats))
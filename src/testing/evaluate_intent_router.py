@@ -0,0 +1,181 @@
+# Offline evaluation: local intent router vs. the triage LLM.
+#
+# The triage LLM's choice for every message is recorded once in a JSON file (this needs
+# OPENAI_API_KEY); later runs only read it, so thresholds can be tuned offline. The knowledge
+# bases are loaded so the router's centroids include their section titles. Run from the repository root:
+#   python -m src.testing.evaluate_intent_router [--labels FILE] [--refresh]
+import argparse
+import asyncio
+import json
+import os
+import statistics
+from collections import Counter
+
+from src.my_agents.triage_agent.intent_router import (
+    LOCAL_ROUTER_MIN_MARGIN, LOCAL_ROUTER_MIN_SIMILARITY, NOTIFICATION_ROUTE, OTHER_ROUTE, PRODUCT_ROUTE,
+    SUPPORT_ROUTE, IntentRouter
+)
+
+DEFAULT_LABELS_FILE = os.path.join(os.path.dirname(__file__), "router_llm_labels.json")
+LLM_CONCURRENCY = 4
+ROUTES = [PRODUCT_ROUTE, SUPPORT_ROUTE, NOTIFICATION_ROUTE, OTHER_ROUTE]
+FALLBACK = "triage"  # Column for messages the router leaves to the triage agent, welcome requests included
+LOCAL_COLUMNS = [PRODUCT_ROUTE, SUPPORT_ROUTE, FALLBACK]
+
+# Hand-labelled messages, deliberately different from the router's built-in examples.
+MESSAGES = {
+    "Does the GrowPod come with a warranty?": PRODUCT_ROUTE,
+    "How long is the warranty on the GrowPod Pro?": PRODUCT_ROUTE,
+    "Which herbs grow best in the GrowPod?": PRODUCT_ROUTE,
+    "How many plants fit in a GrowPod Standard?": PRODUCT_ROUTE,
+    "Is there a discount on seed pod subscriptions?": PRODUCT_ROUTE,
+    "What payment methods do you accept?": PRODUCT_ROUTE,
+    "Can I return a GrowPod I bought two weeks ago?": PRODUCT_ROUTE,
+    "How much electricity does the GrowPod use per month?": PRODUCT_ROUTE,
+    "Can I use my own seeds instead of seed pods?": PRODUCT_ROUTE,
+    "Does the app work on iPad?": PRODUCT_ROUTE,
+    "Is the GrowPod safe to use around children and pets?": PRODUCT_ROUTE,
+    "What colours does the GrowPod Pro come in?": PRODUCT_ROUTE,
+    "The app says my water level is low but the tank is full.": SUPPORT_ROUTE,
+    "My basil is wilting even though the light is on.": SUPPORT_ROUTE,
+    "The pump is very loud at night, is that normal?": SUPPORT_ROUTE,
+    "How do I descale the water tank?": SUPPORT_ROUTE,
+    "How do I pair the GrowPod with my phone over Wi-Fi?": SUPPORT_ROUTE,
+    "There is mould on my seed pods.": SUPPORT_ROUTE,
+    "The LEDs flicker every few minutes.": SUPPORT_ROUTE,
+    "How often should I replace the nutrient solution?": SUPPORT_ROUTE,
+    "My GrowPod shows an error code E3.": SUPPORT_ROUTE,
+    "Where can I get help with a broken GrowPod?": SUPPORT_ROUTE,
+    "The app keeps logging me out.": SUPPORT_ROUTE,
+    "Send a welcome message to Maria.": NOTIFICATION_ROUTE,
+    "Could you welcome our newest customer, Tom Becker?": NOTIFICATION_ROUTE,
+    "Please greet the new user Aisha with a welcome note.": NOTIFICATION_ROUTE,
+    "New sign-up: Lukas. Please send a welcome message.": NOTIFICATION_ROUTE,
+    "Hi there!": OTHER_ROUTE,
+    "What's the best pizza place in town?": OTHER_ROUTE,
+    "Translate 'hello' into French.": OTHER_ROUTE,
+    "Write a poem about tomatoes.": OTHER_ROUTE,
+    "How tall is Mount Everest?": OTHER_ROUTE,
+    "Recommend a good movie for tonight.": OTHER_ROUTE,
+    "Is my GrowPod covered by the warranty if the pump broke?": PRODUCT_ROUTE,
+    "My GrowPod stopped working, can I get a replacement?": SUPPORT_ROUTE,
+}
+
+# Maps the triage LLM's selected agent or tool to a route.
+_LLM_AGENT_ROUTES = {
+    "product_agent": PRODUCT_ROUTE,
+    "support_agent": SUPPORT_ROUTE,
+    "email manager": NOTIFICATION_ROUTE,
+}
+
+_LABELLING_INSTRUCTIONS = """
+
+For this task, do not answer the request and do not call any tool or handoff. Only decide where you would
+send it: set agent_name to exactly one of 'product_agent', 'support_agent', 'Email Manager', or 'none' if
+you would decline the request.
+"""
+
+
+async def _llm_labels(messages):
+    from agents import Agent, Runner
+    from src.my_agents.triage_agent.triage_agent import TriageOutput, triage_agent
+
+    labeller = Agent(
+        name="Triage Labeller",
+        instructions=triage_agent.instructions + _LABELLING_INSTRUCTIONS,
+        model=triage_agent.model,
+        output_type=TriageOutput
+    )
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def label(message):
+        async with semaphore:
+            result = await Runner.run(labeller, message)
+            return message, _LLM_AGENT_ROUTES.get(result.final_output.agent_name.strip().lower(), OTHER_ROUTE)
+
+    return dict(await asyncio.gather(*[label(message) for message in messages]))
+
+
+def load_labels(path: str, refresh: bool) -> dict:
+    """Returns {message: route} from the triage LLM, querying it only for messages not yet recorded."""
+    labels = {}
+    if os.path.exists(path) and not refresh:
+        with open(path, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+    missing = [message for message in MESSAGES if message not in labels]
+    if missing:
+        print(f"Asking the triage LLM about {len(missing)} messages...")
+        labels.update(asyncio.run(_llm_labels(missing)))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(labels, f, indent=2, sort_keys=True)
+    return labels
+
+
+def evaluate(router: IntentRouter, llm_labels: dict, show_errors: bool = False) -> dict:
+    routed = agree_llm = agree_hand = 0
+    latencies = []
+    confusion = Counter()
+    for message, hand_label in MESSAGES.items():
+        decision = router.route(message)
+        latencies.append(decision.latency_ms)
+        confusion[(llm_labels[message], decision.route or FALLBACK)] += 1
+        if decision.route is None:
+            continue
+        routed += 1
+        agree_llm += decision.route == llm_labels[message]
+        agree_hand += decision.route == hand_label
+        if show_errors and decision.route != llm_labels[message]:
+            print(f"  MISROUTED local={decision.route:<12} llm={llm_labels[message]:<12} hand={hand_label:<12} "
+                  f"(similarity={decision.similarity:.3f}, margin={decision.margin:.3f}) {message}")
+    latencies.sort()
+    return {
+        "coverage": routed / len(MESSAGES),
+        "agreement_llm": agree_llm / routed if routed else 1.0,
+        "agreement_hand": agree_hand / routed if routed else 1.0,
+        "confusion": confusion,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def _report(label: str, result: dict) -> None:
+    print(f"  {label:<28} routed locally {result['coverage']:6.1%}   agreement with LLM {result['agreement_llm']:6.1%}   "
+          f"with hand labels {result['agreement_hand']:6.1%}   p50 {result['p50_ms']:6.3f} ms   p95 {result['p95_ms']:6.3f} ms")
+
+
+def _print_confusion(confusion: Counter) -> None:
+    header = "LLM route / local route"
+    print(f"\n  {header:<26}" + "".join(f"{column:>14}" for column in LOCAL_COLUMNS))
+    for llm_route in ROUTES:
+        print(f"  {llm_route:<26}" + "".join(f"{confusion[(llm_route, column)]:>14}" for column in LOCAL_COLUMNS))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the local intent router against recorded triage LLM choices.")
+    parser.add_argument("--labels", default=DEFAULT_LABELS_FILE, help="JSON file recording the triage LLM's choices")
+    parser.add_argument("--refresh", action="store_true", help="Ask the LLM again for every message")
+    args = parser.parse_args()
+
+    llm_labels = load_labels(args.labels, args.refresh)
+    hand_agreement = sum(llm_labels[m] == route for m, route in MESSAGES.items()) / len(MESSAGES)
+    print(f"\n{len(MESSAGES)} messages; the triage LLM agrees with the hand labels on {hand_agreement:.1%}")
+
+    from src.my_agents.triage_agent.triage_agent import intent_router
+    print("\n=== Configured thresholds ===")
+    intent_router.warm_up()
+    result = evaluate(intent_router, llm_labels, show_errors=True)
+    _report(f"sim>={LOCAL_ROUTER_MIN_SIMILARITY} margin>={LOCAL_ROUTER_MIN_MARGIN}", result)
+    _print_confusion(result["confusion"])
+
+    print("\n=== Threshold sweep ===")
+    for min_similarity in (0.35, 0.40, 0.45, 0.50, 0.55):
+        for min_margin in (0.04, 0.08, 0.12):
+            router = IntentRouter(section_titles=intent_router.section_titles,
+                                  min_similarity=min_similarity, min_margin=min_margin)
+            # Reuse the centroids instead of embedding the examples again for every setting
+            router._routes, router._centroids = intent_router._routes, intent_router._centroids
+            _report(f"sim>={min_similarity} margin>={min_margin}", evaluate(router, llm_labels))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Verifies that near-identical questions still hit the semantic answer cache when the starting
+# agent alternates between turns, as it does with the local router (LOCAL_ROUTER_ENABLED=true).
+#
+# Uses an in-memory cache and the embedding model; no LLM calls. Run from the repository root:
+#   python -m src.testing.verify_answer_cache_agents
+from types import SimpleNamespace
+
+from src.my_agents.shared.answer_cache import AnswerCache
+from src.my_agents.product_info_agent.product_info_agent import productInfoAgent
+from src.my_agents.support_info_agent.support_info_agent import supportInfoAgent
+
+TURNS = [
+    (productInfoAgent, "What is the warranty period for the GrowPod?", "The GrowPod has a two-year warranty."),
+    (supportInfoAgent, "How do I clean the water tank?", "Empty the tank and rinse it with warm water."),
+]
+# The same questions, phrased slightly differently
+REPHRASED = [
+    (productInfoAgent, "What is the warranty period for the GrowPod ?"),
+    (supportInfoAgent, "How do I clean the water tank ?!"),
+]
+
+
+def _check(label: str, ok: bool) -> bool:
+    print(f"{'✓' if ok else '✗'} {label}")
+    return ok
+
+
+def verify_answer_cache_agents() -> bool:
+    cache = AnswerCache(agents=[productInfoAgent, supportInfoAgent], knowledge_bases=[], backend="memory",
+                        semantic=True, similarity_threshold=0.9)
+    for agent, question, answer in TURNS:
+        cache.store(question, agent, SimpleNamespace(final_output=answer, last_agent=agent))
+
+    ok = True
+    # Twice round, so every lookup follows a lookup by the other agent
+    for _ in range(2):
+        for (agent, question), (_, _, answer) in zip(REPHRASED, TURNS):
+            hit = cache.lookup(question, agent)
+            ok &= _check(f"{agent.name}: semantic hit for '{question}'",
+                         hit is not None and hit.semantic and hit.answer.answer == answer)
+    ok &= _check("No answer is served to another agent",
+                 cache.lookup(REPHRASED[0][1], supportInfoAgent) is None)
+    return ok
+
+
+if __name__ == "__main__":
+    print("--- Verifying the semantic answer cache with alternating agents ---")
+    print("All checks passed." if verify_answer_cache_agents() else "Some checks FAILED.")
@@ -0,0 +1,57 @@
+# Verifies that an in-place update of a knowledge base invalidates the retrieval cache, even with
+# the background reloader off (KB_RELOAD_INTERVAL_SECONDS=0): a repeated query must miss the cache
+# after a chunk is upserted into the collection.
+#
+# Works on a temporary copy of the product knowledge base. Run from the repository root:
+#   python -m src.testing.verify_retrieval_cache_invalidation
+import os
+import shutil
+import tempfile
+import time
+
+import chromadb
+
+from src.my_agents.shared.embeddings import embed_texts
+from src.my_agents.shared.knowledge_base import KnowledgeBase
+from src.my_agents.product_info_agent.product_info_agent_tools import PRODUCT_CHROMA_PATH, PRODUCT_COLLECTION_NAME
+
+QUERY = "What is the warranty period for the EcoHarvest GrowPod?"
+NEW_CHUNK = "The EcoHarvest GrowPod Max comes with a five-year warranty covering the pump and the LED panel."
+
+
+def _check(label: str, ok: bool) -> bool:
+    print(f"{'✓' if ok else '✗'} {label}")
+    return ok
+
+
+def verify_retrieval_cache_invalidation() -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma_path = os.path.join(tmp, "product_info_db")
+        shutil.copytree(PRODUCT_CHROMA_PATH, chroma_path)
+        kb = KnowledgeBase("product", chroma_path, PRODUCT_COLLECTION_NAME, backend="chroma")
+        kb.initialize()
+
+        ok = _check("First query misses the cache", not kb.query_sync(QUERY).cache_hit)
+        ok &= _check("Repeated query hits the cache", kb.query_sync(QUERY).cache_hit)
+
+        time.sleep(0.01)  # Let the file modification time move on
+        collection = chromadb.PersistentClient(path=chroma_path).get_collection(PRODUCT_COLLECTION_NAME)
+        collection.upsert(ids=["cache-invalidation-check"], documents=[NEW_CHUNK],
+                          embeddings=embed_texts([NEW_CHUNK]).tolist())
+        print(f"Upserted a chunk; published version changed: {kb.published_version() != kb.version}")
+
+        ok &= _check("Repeated query misses the cache after the upsert", not kb.query_sync(QUERY).cache_hit)
+
+        deadline = time.monotonic() + 30
+        while kb.version != kb.published_version() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        ok &= _check("The knowledge base reloaded the updated data", kb.version == kb.published_version())
+        result = kb.query_sync(QUERY)
+        ok &= _check("The reloaded knowledge base finds the new chunk", NEW_CHUNK in result.documents)
+        ok &= _check("Repeated query hits the cache again", kb.query_sync(QUERY).cache_hit)
+    return ok
+
+
+if __name__ == "__main__":
+    print("--- Verifying retrieval cache invalidation ---")
+    print("All checks passed." if verify_retrieval_cache_invalidation() else "Some checks FAILED.")